@@ -0,0 +1,15 @@
+from fastapi import Request
+from supertokens_python.recipe.session.framework.fastapi import verify_session
+from supertokens_python.recipe.userroles import UserRoleClaim
+
+verify_admin_session = verify_session(
+    override_global_claim_validators=lambda global_validators, session, user_context: [  # noqa
+        *global_validators,
+        UserRoleClaim.validators.includes("admin"),
+    ]
+)
+
+
+async def unit_of_work(request: Request):
+    async with request.app.container.unit_of_work():
+        yield
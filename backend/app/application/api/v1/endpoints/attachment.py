@@ -0,0 +1,77 @@
+from typing import Optional
+
+from app.core.di import Container
+from app.domain.schemas.attachment import UploadCreate, UploadResponse
+from app.infrastructure.services.attachment_service import AttachmentService
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends, Header, Request, Response
+from fastapi.responses import FileResponse
+from supertokens_python.recipe.session import SessionContainer
+from supertokens_python.recipe.session.framework.fastapi import verify_session
+
+attachment_router = APIRouter(tags=["Attachment"])
+
+
+# Resumable uploads: POST announces the file with its size and sha256, PATCH
+# sends the bytes from Upload-Offset on in chunks, GET tells where to resume.
+# The upload response carries the attachment once the whole file is verified.
+@attachment_router.post("/attachments/uploads", response_model=UploadResponse)
+@inject
+async def start_upload(
+    upload: UploadCreate,
+    session: SessionContainer = Depends(verify_session()),
+    service: AttachmentService = Depends(Provide[Container.attachment_service]),
+):
+    return await service.start_upload(session.get_user_id(), upload)
+
+
+@attachment_router.get(
+    "/attachments/uploads/{upload_id}", response_model=UploadResponse
+)
+@inject
+async def get_upload(
+    upload_id: str,
+    response: Response,
+    session: SessionContainer = Depends(verify_session()),
+    service: AttachmentService = Depends(Provide[Container.attachment_service]),
+):
+    upload = await service.get_upload(session.get_user_id(), upload_id)
+    response.headers["Upload-Offset"] = str(upload.offset)
+    return upload
+
+
+@attachment_router.patch(
+    "/attachments/uploads/{upload_id}", response_model=UploadResponse
+)
+@inject
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., ge=0),
+    upload_checksum: Optional[str] = Header(None),
+    session: SessionContainer = Depends(verify_session()),
+    service: AttachmentService = Depends(Provide[Container.attachment_service]),
+):
+    upload = await service.write_chunk(
+        session.get_user_id(),
+        upload_id,
+        upload_offset,
+        request.stream(),
+        upload_checksum,
+    )
+    response.headers["Upload-Offset"] = str(upload.offset)
+    return upload
+
+
+@attachment_router.get("/attachments/{attachment_id}")
+@inject
+async def download_attachment(
+    attachment_id: int,
+    session: SessionContainer = Depends(verify_session()),
+    service: AttachmentService = Depends(Provide[Container.attachment_service]),
+):
+    path, attachment = await service.open(session.get_user_id(), attachment_id)
+    return FileResponse(
+        path, media_type=attachment.content_type, filename=attachment.filename
+    )
@@ -1,17 +1,19 @@
-from typing import List
+from typing import Dict, List
 
+from app.application.api.v1.dependencies import unit_of_work
+from app.application.api.v1.etag import make_etag, not_modified, set_etag
 from app.core.di import Container
 from app.domain.schemas.chat import ChatCreate, ChatResponse
 from app.infrastructure.services.chat_service import ChatService
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Body, Depends
+from fastapi import APIRouter, Body, Depends, Request, Response
 from supertokens_python.recipe.session import SessionContainer
 from supertokens_python.recipe.session.framework.fastapi import verify_session
 
 chat_router = APIRouter(tags=["Chat"])
 
 
-@chat_router.post("/chat_create")
+@chat_router.post("/chat_create", dependencies=[Depends(unit_of_work)])
 @inject
 async def create_chat(
     target_user_id: str = Body(...),
@@ -24,16 +26,40 @@ async def create_chat(
     return await service.create_chat(schema)
 
 
-@chat_router.get("/chats", response_model=List[ChatResponse])
+@chat_router.get(
+    "/chats",
+    response_model=List[ChatResponse],
+    dependencies=[Depends(unit_of_work)],
+)
 @inject
 async def get_user_chats(
+    request: Request,
+    response: Response,
     session: SessionContainer = Depends(verify_session()),
     service: ChatService = Depends(Provide[Container.chat_service]),
 ):
-    return await service.get_user_chats(session.get_user_id())
+    user_id = session.get_user_id()
+    version = await service.get_user_chats_version(user_id)
+    if version is not None:
+        etag = make_etag("chats", user_id, version)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        set_etag(response, etag)
 
+    return await service.get_user_chats(user_id)
 
-@chat_router.delete("/delete_chat")
+
+@chat_router.get("/chats/unread", response_model=Dict[int, int])
+@inject
+async def get_unread_counts(
+    session: SessionContainer = Depends(verify_session()),
+    service: ChatService = Depends(Provide[Container.chat_service]),
+):
+    return await service.get_unread_counts(session.get_user_id())
+
+
+@chat_router.delete("/delete_chat", dependencies=[Depends(unit_of_work)])
 @inject
 async def delete_user_chat(
     chat_id: int,
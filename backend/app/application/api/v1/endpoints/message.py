@@ -1,33 +1,87 @@
+from typing import List, Literal, Optional
+
+from app.application.api.v1.dependencies import unit_of_work
+from app.application.api.v1.etag import make_etag, not_modified, set_etag
+from app.application.api.v1.streaming import (accepts_gzip, gzipped,
+                                              json_array, json_lines)
 from app.core.di import Container
 from app.domain.schemas.message import MessageCreate, MessageResponse
+from app.infrastructure.services.chat_service import ChatService
 from app.infrastructure.services.message_service import MessageService
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Body, Depends
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from supertokens_python.recipe.session import SessionContainer
 from supertokens_python.recipe.session.framework.fastapi import verify_session
 
 message_router = APIRouter(tags=["Message"])
 
 
-@message_router.get("/messages/{chat_id}", response_model=list[MessageResponse])
+@message_router.get(
+    "/messages/{chat_id}",
+    response_model=list[MessageResponse],
+    dependencies=[Depends(unit_of_work)],
+)
 @inject
 async def get_chat_messages(
     chat_id: int,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    before_id: Optional[int] = None,
     session: SessionContainer = Depends(verify_session()),
     service: MessageService = Depends(Provide[Container.message_service]),
+    chat_service: ChatService = Depends(Provide[Container.chat_service]),
 ):
-    return await service.get_chat_messages(chat_id)
+    version = await chat_service.get_version(chat_id)
+    if version is not None:
+        etag = make_etag("chat", chat_id, version, limit or "all", before_id or "")
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        set_etag(response, etag)
+
+    return await service.get_chat_messages(chat_id, limit, before_id, version)
+
+
+@message_router.get("/messages/{chat_id}/export")
+@inject
+async def export_chat_messages(
+    chat_id: int,
+    request: Request,
+    format: Literal["ndjson", "json"] = "ndjson",
+    session: SessionContainer = Depends(verify_session()),
+    service: MessageService = Depends(Provide[Container.message_service]),
+    chat_service: ChatService = Depends(Provide[Container.chat_service]),
+):
+    await chat_service.ensure_member(chat_id, session.get_user_id())
+
+    # no unit of work here, the rows are read while the response is being sent
+    # and the service opens one for as long as that takes
+    encode = json_lines if format == "ndjson" else json_array
+    body = encode(service.export_chat_messages(chat_id), MessageResponse)
+    headers = {
+        "Content-Disposition": f'attachment; filename="chat-{chat_id}.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_gzip(request):
+        body = gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
 
-@message_router.post("/send_message")
+@message_router.post("/send_message", dependencies=[Depends(unit_of_work)])
 @inject
 async def send_message(
     chat_id: int = Body(...),
     content: str = Body(...),
+    attachment_ids: List[int] = Body([]),
     session: SessionContainer = Depends(verify_session()),
     service: MessageService = Depends(Provide[Container.message_service]),
 ):
     data = MessageCreate(
         content=content, chat_id=chat_id, sender_id=session.get_user_id()
     )
-    return await service.create_and_send_message(data)
+    return await service.create_and_send_message(data, attachment_ids)
@@ -0,0 +1,17 @@
+from app.application.api.v1.dependencies import verify_admin_session
+from app.core.di import Container
+from app.infrastructure.rate_limit import RateLimiter
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends
+from supertokens_python.recipe.session import SessionContainer
+
+socket_router = APIRouter(tags=["Socket"])
+
+
+@socket_router.get("/socket/throttle_stats")
+@inject
+async def get_throttle_stats(
+    session: SessionContainer = Depends(verify_admin_session),
+    rate_limiter: RateLimiter = Depends(Provide[Container.rate_limiter]),
+):
+    return rate_limiter.stats()
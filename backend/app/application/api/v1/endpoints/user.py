@@ -1,8 +1,15 @@
+from app.application.api.v1.dependencies import (unit_of_work,
+                                                 verify_admin_session)
+from app.core.config import settings
 from app.core.di import Container
 from app.domain.schemas.user import UserCreate, UserResponse, UserUpdate
+from app.infrastructure.services.user_import import detect_format, iter_lines
 from app.infrastructure.services.user_service import UserService
+from app.infrastructure.user_index import UserSearchIndex
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends, File, Form, UploadFile
+from fastapi import (APIRouter, Depends, File, Form, HTTPException, Request,
+                     UploadFile)
+from fastapi.responses import StreamingResponse
 from supertokens_python.recipe.session import SessionContainer
 from supertokens_python.recipe.session.framework.fastapi import verify_session
 
@@ -18,6 +25,54 @@ async def create_user(
     return await service.create_user(user)
 
 
+@user_router.post("/users/import")
+@inject
+async def import_users(
+    request: Request,
+    session: SessionContainer = Depends(verify_admin_session),
+    service: UserService = Depends(Provide[Container.user_service]),
+):
+    fmt = detect_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415, detail="Expected application/x-ndjson or text/csv"
+        )
+
+    return StreamingResponse(
+        service.import_users(iter_lines(request.stream()), fmt),
+        media_type="application/x-ndjson",
+    )
+
+
+@user_router.post("/users/reindex", status_code=202)
+@inject
+async def reindex_users(
+    session: SessionContainer = Depends(verify_admin_session),
+    index: UserSearchIndex = Depends(Provide[Container.user_search_index]),
+):
+    if settings.SEARCH_BACKEND != "typesense":
+        raise HTTPException(
+            status_code=400, detail="Search is served from Postgres directly"
+        )
+    if not index.start_rebuild():
+        raise HTTPException(status_code=409, detail="Reindex already running")
+    return {"status": "started"}
+
+
+@user_router.get("/users/reindex")
+@inject
+async def get_reindex_status(
+    session: SessionContainer = Depends(verify_admin_session),
+    index: UserSearchIndex = Depends(Provide[Container.user_search_index]),
+):
+    return {
+        "running": index.rebuilding,
+        "collection": await index.current_collection(),
+        "last_rebuild": index.last_rebuild,
+        "last_reconcile": index.last_reconcile,
+    }
+
+
 @user_router.get("/user/{supertokens_user_id}", response_model=UserResponse)
 @inject
 async def get_user(
@@ -27,7 +82,11 @@ async def get_user(
     return await service.get_by_supertokens_id(supertokens_user_id)
 
 
-@user_router.patch("/user", response_model=UserResponse)
+@user_router.patch(
+    "/user",
+    response_model=UserResponse,
+    dependencies=[Depends(unit_of_work)],
+)
 @inject
 async def update_user(
     image: UploadFile = File(None),
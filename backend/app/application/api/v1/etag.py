@@ -0,0 +1,27 @@
+from typing import Optional
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(
+            status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        )
+    return None
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -1,5 +1,7 @@
+from app.application.api.v1.endpoints.attachment import attachment_router
 from app.application.api.v1.endpoints.chat import chat_router
 from app.application.api.v1.endpoints.message import message_router
+from app.application.api.v1.endpoints.socket import socket_router
 from app.application.api.v1.endpoints.user import user_router
 from fastapi import APIRouter
 
@@ -8,6 +10,8 @@ router_list = [
     user_router,
     chat_router,
     message_router,
+    socket_router,
+    attachment_router,
 ]
 
 for router in router_list:
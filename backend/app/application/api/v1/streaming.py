@@ -0,0 +1,52 @@
+import asyncio
+import zlib
+from typing import AsyncIterator, List, Type
+
+from app.core.config import settings
+from fastapi import Request
+from pydantic import BaseModel
+
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() == "gzip" and params.replace(" ", "") != "q=0":
+            return True
+    return False
+
+
+async def json_lines(
+    chunks: AsyncIterator[List], schema: Type[BaseModel]
+) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        if chunk:
+            yield b"".join(
+                schema.model_validate(item).model_dump_json().encode() + b"\n"
+                for item in chunk
+            )
+
+
+async def json_array(
+    chunks: AsyncIterator[List], schema: Type[BaseModel]
+) -> AsyncIterator[bytes]:
+    separator = b"["
+    async for chunk in chunks:
+        if chunk:
+            yield separator + b",".join(
+                schema.model_validate(item).model_dump_json().encode()
+                for item in chunk
+            )
+            separator = b","
+    yield b"]" if separator == b"," else b"[]"
+
+
+async def gzipped(
+    body: AsyncIterator[bytes], level: int = settings.EXPORT_GZIP_LEVEL
+) -> AsyncIterator[bytes]:
+    # compressed as it is produced, the deflate window is all that is buffered
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for data in body:
+        compressed = await asyncio.to_thread(compressor.compress, data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
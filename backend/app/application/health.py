@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+health_router = APIRouter(tags=["Health"])
+
+
+@health_router.get("/livez")
+async def livez():
+    return {"status": "ok"}
+
+
+@health_router.get("/readyz")
+async def readyz(request: Request):
+    readiness = request.app.state.readiness
+    return JSONResponse(
+        status_code=200 if readiness.ready else 503,
+        content={
+            "ready": readiness.ready,
+            "ready_after": readiness.ready_after,
+            "draining": readiness.draining,
+            "checks": readiness.results,
+        },
+    )
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import LOOP_BLOCKS, LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = settings.LOOP_MONITOR_INTERVAL,
+        block_threshold: float = settings.LOOP_BLOCK_THRESHOLD,
+        capture_stacks: bool = settings.LOOP_BLOCK_CAPTURE_STACKS,
+    ) -> None:
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.capture_stacks = capture_stacks
+        self.lag = 0.0
+        self._beat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        if self.capture_stacks:
+            self._stopped.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch,
+                args=(threading.get_ident(),),
+                name="loop-watchdog",
+                daemon=True,
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._beat = now
+
+            # how late the loop got around to waking this task up
+            self.lag = max(0.0, now - expected)
+            LOOP_LAG_SECONDS.observe(self.lag)
+            if self.lag >= self.block_threshold:
+                LOOP_BLOCKS.inc()
+                if not self.capture_stacks:
+                    logger.warning(f"Event loop was blocked for {self.lag:.3f}s")
+
+    def _watch(self, loop_thread_id: int) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.block_threshold / 2):
+            beat = self._beat
+            # the monitor task sleeps for one interval between beats
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.block_threshold or beat == reported_beat:
+                continue
+
+            # the loop thread is still inside the blocking callback right now
+            frame = sys._current_frames().get(loop_thread_id)
+            if frame is None:
+                continue
+            reported_beat = beat
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(
+                f"Event loop blocked for over {stalled:.3f}s, "
+                f"loop thread stack:\n{stack}"
+            )
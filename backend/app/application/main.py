@@ -1,13 +1,27 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
 import socketio
 from app.application.api.v1 import router
+from app.application.health import health_router
+from app.application.loop_monitor import LoopMonitor
+from app.application.metrics import (AppCollector, MetricsMiddleware,
+                                     metrics_router)
+from app.application.profiler import (ProfilerMiddleware, profiler_router,
+                                      profiling_enabled)
+from app.application.readiness import Readiness, check_supertokens
+from app.application.shutdown import GracefulShutdown
 from app.application.socket_io import sio
+from app.application.tracing import TracingMiddleware
 from app.core.di import Container
+from app.core.logs import configure_logging, shutdown_logging
+from app.core.tracing import TRACEPARENT, configure_tracing, shutdown_tracing
 from app.infrastructure.ws_routes import ChatNamespace
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from prometheus_client import REGISTRY
 from supertokens_python import (InputAppInfo, SupertokensConfig,
                                 get_all_cors_headers, init)
 from supertokens_python.framework.fastapi import get_middleware
@@ -21,13 +35,59 @@ from typing import Optional
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Setup
-    container = Container()
-    db = container.database()
-    await db.create_db()
-    app.container = container
+    container = app.container
+    search_index = container.user_search_index()
+
+    async def warm_database():
+        db = container.database()
+        await db.create_db()
+        await container.message_archive().ensure_partitions()
+        await db.warm_up(settings.DB_WARM_CONNECTIONS)
+        await container.search_backend().prepare()
+
+    checks = {"database": warm_database, "supertokens": check_supertokens}
+    if settings.SEARCH_BACKEND == "typesense":
+        checks["typesense"] = search_index.ensure_collection
+
+    # serving starts right away, /readyz reports when the dependencies are up
+    readiness = app.state.readiness = Readiness(checks)
+    readiness.start()
+    shutdown = GracefulShutdown(sio, app.state.chat_namespace, readiness)
+    shutdown.install_signal_handlers()
+
+    loop_monitor = LoopMonitor()
+    loop_monitor.start()
+    activity = container.activity_buffer()
+    activity.start()
+    if settings.SEARCH_BACKEND == "typesense":
+        search_index.start()
+    presence_store = app.state.chat_namespace.presence.store
+    if presence_store is not None:
+        presence_store.start()
+    message_archive = container.message_archive()
+    message_archive.start()
+    upload_sweeper = container.upload_sweeper()
+    upload_sweeper.start()
 
     yield
 
+    # Teardown
+    await shutdown.drain()
+    await readiness.stop()
+    await search_index.stop()
+    if presence_store is not None:
+        await presence_store.stop()
+    await message_archive.stop()
+    await upload_sweeper.stop()
+    try:
+        await asyncio.wait_for(activity.stop(), settings.SHUTDOWN_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        logging.error("Timed out flushing buffered activity on shutdown")
+    await container.database().dispose()
+    await loop_monitor.stop()
+    shutdown_tracing()
+    shutdown_logging()
+
 
 def get_origin(request: Optional[BaseRequest]) -> str:
     if request is not None:
@@ -42,6 +102,8 @@ def get_origin(request: Optional[BaseRequest]) -> str:
 
 
 def create_app():
+    configure_logging()
+    configure_tracing()
     init(
         app_info=InputAppInfo(
             app_name="abilgram",
@@ -63,9 +125,25 @@ def create_app():
         mode="asgi",
     )
 
+    container = Container()
+
     app = FastAPI(lifespan=lifespan)
+    app.container = container
 
-    sio.register_namespace(ChatNamespace("/chat"))
+    chat_namespace = ChatNamespace(
+        "/chat",
+        chat_service=container.chat_service,
+        activity=container.activity_buffer(),
+        rate_limiter=container.rate_limiter(),
+        presence_store=(
+            container.presence_store()
+            if settings.PRESENCE_STORE == "postgres"
+            else None
+        ),
+    )
+    sio.register_namespace(chat_namespace)
+    app.state.chat_namespace = chat_namespace
+    REGISTRY.register(AppCollector(container, sio, chat_namespace))
     sio_app = socketio.ASGIApp(sio)
 
     app.mount("/media", StaticFiles(directory="/app/media"), name="static")
@@ -79,9 +157,18 @@ def create_app():
         allow_origins=settings.CORS_ORIGINS,
         allow_credentials=True,
         allow_methods=["GET", "PUT", "POST", "DELETE", "OPTIONS", "PATCH"],
-        allow_headers=["Content-Type"] + get_all_cors_headers(),
+        allow_headers=["Content-Type", TRACEPARENT, "Upload-Offset", "Upload-Checksum"] +
+        get_all_cors_headers(),
+        expose_headers=[TRACEPARENT, "Upload-Offset"],
     )
-
+    if profiling_enabled():
+        app.add_middleware(ProfilerMiddleware)
+    app.add_middleware(TracingMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    app.include_router(health_router)
+    app.include_router(metrics_router)
+    app.include_router(profiler_router)
     app.include_router(prefix="/api/v1", router=router.routers)
 
     return app
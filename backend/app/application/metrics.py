@@ -0,0 +1,212 @@
+import hmac
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from app.core import logs
+from app.core.config import settings
+from app.core.metrics import HTTP_REQUEST_SECONDS, REQUEST_DB_STATEMENTS
+from app.core.query_stats import query_scope
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        started_at = time.perf_counter()
+
+        with query_scope(f"{scope['method']} {scope['path']}") as stats:
+
+            async def send_with_status(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    stats.name = f"{scope['method']} {self._route(scope)}"
+                    stats.check_budget()
+                    if settings.SQL_SERVER_TIMING:
+                        message.setdefault("headers", [])
+                        message["headers"] = list(message["headers"]) + [
+                            (
+                                b"server-timing",
+                                f'db;dur={stats.db_time * 1000:.1f};'
+                                f'desc="{stats.count} queries"'.encode(),
+                            )
+                        ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # route templates, not raw paths, keep the label set bounded
+                route = self._route(scope)
+                HTTP_REQUEST_SECONDS.labels(
+                    scope["method"], route, f"{status // 100}xx"
+                ).observe(time.perf_counter() - started_at)
+                REQUEST_DB_STATEMENTS.labels(route).observe(stats.count)
+
+    def _route(self, scope) -> str:
+        route = scope.get("route")
+        return getattr(route, "path", None) or self._fallback_route(scope)
+
+    @staticmethod
+    def _fallback_route(scope) -> str:
+        if scope["path"].startswith("/socket.io"):
+            return "/socket.io/"
+        if scope["path"].startswith("/media/"):
+            return "/media"
+        return "unmatched"
+
+
+# reads the counters the components already keep, at scrape time
+class AppCollector:
+    def __init__(self, container, sio, namespace) -> None:
+        self.container = container
+        self.sio = sio
+        self.namespace = namespace
+
+    def collect(self):
+        pool = GaugeMetricFamily(
+            "db_pool_connections", "Database pool connections", labels=["state"]
+        )
+        for state, value in self.container.database().pool_status().items():
+            pool.add_metric([state], value)
+        yield pool
+
+        yield GaugeMetricFamily(
+            "socketio_connections",
+            "Open Socket.IO connections",
+            value=len(self.sio.eio.sockets),
+        )
+
+        yield GaugeMetricFamily(
+            "socketio_identified_users",
+            "Socket.IO connections bound to a user",
+            value=len(self.namespace.active_users),
+        )
+
+        rate_limiter = self.container.rate_limiter()
+        for name, documentation, counts in (
+            (
+                "socketio_throttled_events",
+                "Events rejected by the rate limiter",
+                rate_limiter.throttled,
+            ),
+            (
+                "socketio_dropped_emits",
+                "Emits dropped for slow consumers",
+                rate_limiter.dropped_emits,
+            ),
+        ):
+            family = CounterMetricFamily(name, documentation, labels=["event"])
+            for event, count in self._by_event(counts).items():
+                family.add_metric([event], count)
+            yield family
+
+        disconnects = CounterMetricFamily(
+            "socketio_forced_disconnects",
+            "Connections closed by the server",
+            labels=["reason"],
+        )
+        for reason, count in rate_limiter.disconnects.items():
+            disconnects.add_metric([reason], count)
+        yield disconnects
+
+        single_flight = self.container.single_flight()
+        yield CounterMetricFamily(
+            "single_flight_executed", "Reads executed", value=single_flight.executed
+        )
+        yield CounterMetricFamily(
+            "single_flight_coalesced",
+            "Reads served by an identical one in flight",
+            value=single_flight.coalesced,
+        )
+
+        buffer = self.container.message_buffer()
+        yield CounterMetricFamily(
+            "message_buffer_hits",
+            "Message pages served from memory",
+            value=buffer.hits,
+        )
+        yield CounterMetricFamily(
+            "message_buffer_misses",
+            "Message pages read from the database",
+            value=buffer.misses,
+        )
+        yield GaugeMetricFamily(
+            "message_buffer_messages", "Messages held in memory", value=len(buffer)
+        )
+
+        loader = self.container.user_batch_loader()
+        yield CounterMetricFamily(
+            "user_loader_batches", "Batched user queries", value=loader.batches
+        )
+        yield CounterMetricFamily(
+            "user_loader_requested",
+            "Users requested through the loader",
+            value=loader.requested,
+        )
+
+        yield GaugeMetricFamily(
+            "activity_pending_writes",
+            "Buffered last seen and read receipt updates",
+            value=self.container.activity_buffer().pending,
+        )
+
+        presence_store = self.namespace.presence.store
+        if presence_store is not None:
+            yield GaugeMetricFamily(
+                "presence_online_users",
+                "Users connected to any worker",
+                value=len(presence_store.online),
+            )
+            yield CounterMetricFamily(
+                "presence_refreshes",
+                "Batched presence reads triggered by notifications",
+                value=presence_store.refreshes,
+            )
+
+        log_stats = logs.stats()
+        yield CounterMetricFamily(
+            "log_records_dropped",
+            "Records dropped because the log writer fell behind",
+            value=log_stats["dropped"],
+        )
+        yield CounterMetricFamily(
+            "log_records_suppressed",
+            "Socket event records dropped by sampling and rate limits",
+            value=log_stats["suppressed"],
+        )
+
+    def _by_event(self, counts: Dict[str, int]) -> Counter:
+        labelled = Counter()
+        for event, count in counts.items():
+            handled = hasattr(self.namespace, f"on_{event}")
+            labelled[event if handled else "unhandled"] += count
+        return labelled
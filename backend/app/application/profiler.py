@@ -0,0 +1,121 @@
+import asyncio
+import hmac
+import logging
+import random
+import re
+import time
+from pathlib import Path
+from typing import List
+
+from app.application.api.v1.dependencies import verify_admin_session
+from app.core.config import settings
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from supertokens_python.recipe.session import SessionContainer
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_SUFFIX = ".speedscope.json"
+
+profiler_router = APIRouter(tags=["Profiler"])
+
+
+def profiling_enabled() -> bool:
+    return bool(settings.PROFILER_TOKEN) or settings.PROFILER_SAMPLE_RATE > 0
+
+
+@profiler_router.get("/profiles")
+async def list_profiles(
+    session: SessionContainer = Depends(verify_admin_session),
+) -> List[str]:
+    return [path.name for path in _profiles()]
+
+
+@profiler_router.get("/profiles/{name}")
+async def get_profile(
+    name: str, session: SessionContainer = Depends(verify_admin_session)
+):
+    path = Path(settings.PROFILER_DIR) / name
+    if "/" in name or not name.endswith(PROFILE_SUFFIX) or not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json")
+
+
+def _profiles() -> List[Path]:
+    directory = Path(settings.PROFILER_DIR)
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(f"*{PROFILE_SUFFIX}"), reverse=True)
+
+
+def _write_profile(name: str, profiler) -> None:
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    directory = Path(settings.PROFILER_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_text(profiler.output(SpeedscopeRenderer()))
+    for stale in _profiles()[settings.PROFILER_MAX_FILES:]:
+        stale.unlink(missing_ok=True)
+
+
+class ProfilerMiddleware:
+    # only installed when profiling is configured, see profiling_enabled
+    def __init__(self, app) -> None:
+        self.app = app
+        # the sampling profiler hooks the thread, so one request at a time
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy or not self._wanted(scope):
+            return await self.app(scope, receive, send)
+
+        from pyinstrument import Profiler
+
+        started_at = time.time()
+        name = f"{int(started_at * 1000)}-{self._slug(scope)}{PROFILE_SUFFIX}"
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", name.encode())
+                ]
+            await send(message)
+
+        self._busy = True
+        # awaits are attributed to the coroutine that is waiting, so time spent
+        # in services and repositories shows up under the route that called them
+        profiler = Profiler(interval=settings.PROFILER_INTERVAL, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profiler.stop()
+            self._busy = False
+            elapsed = time.time() - started_at
+            try:
+                await asyncio.to_thread(_write_profile, name, profiler)
+                logger.info(
+                    f"Profiled {scope['method']} {scope['path']} in "
+                    f"{elapsed:.3f}s to {name}"
+                )
+            except Exception as e:
+                logger.error(f"Failed to store profile {name}: {e}")
+
+    @staticmethod
+    def _wanted(scope) -> bool:
+        if settings.PROFILER_TOKEN:
+            for key, value in scope["headers"]:
+                if key == PROFILE_HEADER:
+                    return hmac.compare_digest(value, settings.PROFILER_TOKEN.encode())
+
+        return (
+            settings.PROFILER_SAMPLE_RATE > 0 and
+            scope["path"].startswith(settings.PROFILER_PATH_PREFIX) and
+            random.random() < settings.PROFILER_SAMPLE_RATE
+        )
+
+    @staticmethod
+    def _slug(scope) -> str:
+        path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        return f"{scope['method']}-{path[:60]}"
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Check = Callable[[], Awaitable[None]]
+
+# taken at import, close to when the worker process started
+PROCESS_STARTED_AT = time.monotonic()
+
+
+async def check_supertokens() -> None:
+    async with httpx.AsyncClient(timeout=settings.STARTUP_CHECK_TIMEOUT) as client:
+        response = await client.get(f"{settings.SUPERTOKENS_URI}/hello")
+        response.raise_for_status()
+
+
+class Readiness:
+    def __init__(
+        self,
+        checks: Dict[str, Check],
+        timeout: float = settings.STARTUP_CHECK_TIMEOUT,
+        max_interval: float = settings.STARTUP_RETRY_MAX_INTERVAL,
+    ) -> None:
+        self.checks = checks
+        self.timeout = timeout
+        self.max_interval = max_interval
+        self.results: Dict[str, Dict] = {name: {"ready": False} for name in checks}
+        self.ready_after: Optional[float] = None
+        self.draining = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_after is not None and not self.draining
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        await asyncio.gather(
+            *(self._run_check(name, check) for name, check in self.checks.items())
+        )
+        self.ready_after = round(time.monotonic() - PROCESS_STARTED_AT, 3)
+        timings = {name: result["elapsed"] for name, result in self.results.items()}
+        logger.info(f"Ready {self.ready_after}s after start, warm-up took {timings}")
+
+    async def _run_check(self, name: str, check: Check) -> None:
+        started_at = time.monotonic()
+        interval = 0.5
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                await asyncio.wait_for(check(), self.timeout)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                self.results[name] = {
+                    "ready": False,
+                    "error": error,
+                    "attempts": attempts,
+                }
+                logger.warning(f"Startup check {name} failed, retrying: {error}")
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, self.max_interval)
+                continue
+
+            self.results[name] = {
+                "ready": True,
+                "elapsed": round(time.monotonic() - started_at, 3),
+                "attempts": attempts,
+            }
+            return
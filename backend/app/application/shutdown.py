@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import signal
+import time
+from typing import Callable, Optional
+
+from app.application.readiness import Readiness
+from app.application.socket_io import DrainingServer
+from app.core.config import settings
+from app.infrastructure.ws_routes import ChatNamespace
+
+logger = logging.getLogger(__name__)
+
+
+class GracefulShutdown:
+    def __init__(
+        self,
+        sio: DrainingServer,
+        namespace: ChatNamespace,
+        readiness: Readiness,
+        timeout: float = settings.SHUTDOWN_DRAIN_TIMEOUT,
+        jitter: float = settings.SHUTDOWN_RECONNECT_JITTER,
+    ) -> None:
+        self.sio = sio
+        self.namespace = namespace
+        self.readiness = readiness
+        self.timeout = timeout
+        self.jitter = jitter
+        self._task: Optional[asyncio.Task] = None
+
+    def install_signal_handlers(self) -> None:
+        # runs ahead of uvicorn's own handler, which closes every websocket
+        # as soon as it is called
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous = signal.getsignal(sig)
+            try:
+                loop.add_signal_handler(sig, self._on_signal, sig, previous)
+            except (NotImplementedError, RuntimeError, ValueError):
+                return
+
+    def _on_signal(self, sig: signal.Signals, previous: Callable) -> None:
+        loop = asyncio.get_running_loop()
+        loop.remove_signal_handler(sig)
+        signal.signal(sig, previous)
+
+        def hand_over(_):
+            if callable(previous):
+                previous(sig, None)
+
+        task = self._start()
+        task.add_done_callback(hand_over)
+
+    def _start(self) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain())
+        return self._task
+
+    async def drain(self) -> None:
+        await self._start()
+
+    async def _drain(self) -> None:
+        started_at = time.monotonic()
+        deadline = started_at + self.timeout
+
+        self.readiness.draining = True
+        self.sio.draining = True
+        clients = len(self.namespace.connected_sids())
+        logger.info(f"Draining {clients} socket clients")
+
+        try:
+            await self.namespace.advise_reconnect(self.jitter)
+        except Exception as e:
+            logger.error(f"Failed to advise clients to reconnect: {e}")
+
+        # clients leave on their own once the advice has been delivered
+        await self._wait(lambda: not self.namespace.connected_sids(), deadline)
+
+        # stragglers still get what was queued for them before being cut off
+        await self._wait(lambda: self.namespace.outbound_backlog() == 0, deadline)
+        remaining = self.namespace.connected_sids()
+        for sid in remaining:
+            try:
+                await self.namespace.disconnect(sid)
+            except Exception as e:
+                logger.error(f"Failed to disconnect SID {sid}: {e}")
+
+        await self._wait(lambda: self.namespace.in_flight == 0, deadline)
+        try:
+            await self.namespace.presence.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush presence updates: {e}")
+
+        logger.info(
+            f"Drained socket clients in {time.monotonic() - started_at:.3f}s, "
+            f"{len(remaining)} of {clients} disconnected by the server, "
+            f"{self.namespace.in_flight} handlers still running"
+        )
+
+    @staticmethod
+    async def _wait(done: Callable[[], bool], deadline: float) -> None:
+        while not done() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
@@ -1,5 +1,39 @@
+from urllib.parse import parse_qs
+
 import socketio
+from app.core.config import settings
+from app.core.metrics import SOCKET_EMITS
+
+
+class CountingManager(socketio.AsyncManager):
+    async def emit(self, event, data, namespace, **kwargs):
+        SOCKET_EMITS.labels(event).inc()
+        return await super().emit(event, data, namespace, **kwargs)
+
+
+class DrainingServer(socketio.AsyncServer):
+    def __init__(self, **kwargs):
+        kwargs.setdefault("client_manager", CountingManager())
+        super().__init__(**kwargs)
+        self.draining = False
+
+    async def handle_request(self, scope, receive, send):
+        # requests of an open session carry its sid, only new ones are refused
+        if self.draining and "sid" not in parse_qs(scope["query_string"].decode()):
+            # refused handshakes make clients retry with backoff, elsewhere
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1013})
+            else:
+                await send({"type": "http.response.start", "status": 503})
+                await send({"type": "http.response.body", "body": b""})
+            return
+
+        return await super().handle_request(scope, receive, send)
+
 
-sio = socketio.AsyncServer(
-    async_mode="asgi", cors_allowed_origins="*"
+sio = DrainingServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    http_compression=settings.SOCKET_HTTP_COMPRESSION,
+    compression_threshold=settings.SOCKET_COMPRESSION_THRESHOLD,
 )
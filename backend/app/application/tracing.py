@@ -0,0 +1,46 @@
+from app.core.tracing import TRACEPARENT, current_traceparent, extract, tracer
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+
+class TracingMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # socket events get their own spans, long polls would only add noise
+        if scope["type"] != "http" or scope["path"].startswith("/socket.io"):
+            return await self.app(scope, receive, send)
+
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+            if key == TRACEPARENT.encode()
+        }
+        with tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=extract(headers),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": scope["method"]},
+        ) as span:
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    route = getattr(scope.get("route"), "path", None)
+                    if route is not None:
+                        span.update_name(f"{scope['method']} {route}")
+                        span.set_attribute("http.route", route)
+                    status = message["status"]
+                    span.set_attribute("http.response.status_code", status)
+                    if status >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+
+                    # lets the client continue the trace, e.g. in the socket event
+                    # that follows a REST write
+                    traceparent = current_traceparent()
+                    if traceparent is not None:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (TRACEPARENT.encode(), traceparent.encode())
+                        ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
@@ -33,6 +33,170 @@ class Settings(BaseSettings):
     API_DOMAIN: str = os.getenv("API_DOMAIN", "http://localhost:5173")
     WEBSITE_DOMAIN: str = os.getenv("WEBSITE_DOMAIN", "http://localhost:8000")
 
+    # Socket.IO transport
+    SOCKET_HTTP_COMPRESSION: bool = os.getenv("SOCKET_HTTP_COMPRESSION", "true") == "true"
+    SOCKET_COMPRESSION_THRESHOLD: int = int(
+        os.getenv("SOCKET_COMPRESSION_THRESHOLD", "1024")
+    )
+
+    # Socket.IO presence
+    PRESENCE_COALESCE_WINDOW: float = float(
+        os.getenv("PRESENCE_COALESCE_WINDOW", "1.0")
+    )
+    # "postgres" shares presence between workers, "memory" keeps it per process
+    PRESENCE_STORE: str = os.getenv("PRESENCE_STORE", "postgres")
+    # a connection counts as gone this long after its worker last refreshed it
+    PRESENCE_TTL: float = float(os.getenv("PRESENCE_TTL", "45"))
+    PRESENCE_HEARTBEAT_INTERVAL: float = float(
+        os.getenv("PRESENCE_HEARTBEAT_INTERVAL", "15")
+    )
+    PRESENCE_REFRESH_WINDOW: float = float(
+        os.getenv("PRESENCE_REFRESH_WINDOW", "0.05")
+    )
+
+    # Socket.IO rate limiting and backpressure
+    SOCKET_SID_RATE: float = float(os.getenv("SOCKET_SID_RATE", "10"))
+    SOCKET_SID_BURST: float = float(os.getenv("SOCKET_SID_BURST", "20"))
+    SOCKET_USER_RATE: float = float(os.getenv("SOCKET_USER_RATE", "20"))
+    SOCKET_USER_BURST: float = float(os.getenv("SOCKET_USER_BURST", "40"))
+    SOCKET_MAX_VIOLATIONS: int = int(os.getenv("SOCKET_MAX_VIOLATIONS", "50"))
+    # violations forgiven per second, a client has to keep overrunning to go
+    SOCKET_VIOLATION_DECAY: float = float(os.getenv("SOCKET_VIOLATION_DECAY", "1"))
+    SOCKET_MAX_OUTBOUND_QUEUE: int = int(os.getenv("SOCKET_MAX_OUTBOUND_QUEUE", "100"))
+    # "drop" or "disconnect"
+    SOCKET_SLOW_CONSUMER_POLICY: str = os.getenv("SOCKET_SLOW_CONSUMER_POLICY", "drop")
+
+    # In-memory buffer of the newest messages of active chats
+    MESSAGE_BUFFER_PER_CHAT: int = int(os.getenv("MESSAGE_BUFFER_PER_CHAT", "100"))
+    MESSAGE_BUFFER_MAX_MESSAGES: int = int(
+        os.getenv("MESSAGE_BUFFER_MAX_MESSAGES", "200000")
+    )
+
+    # Monthly message partitions and archival of old ones to gzip files
+    MESSAGE_PARTITIONS_AHEAD: int = int(os.getenv("MESSAGE_PARTITIONS_AHEAD", "2"))
+    # partitions ending this many days ago are archived, 0 keeps everything live
+    MESSAGE_ARCHIVE_AFTER_DAYS: int = int(
+        os.getenv("MESSAGE_ARCHIVE_AFTER_DAYS", "365")
+    )
+    MESSAGE_ARCHIVE_DIR: str = os.getenv("MESSAGE_ARCHIVE_DIR", "archive")
+    MESSAGE_ARCHIVE_INTERVAL: float = float(
+        os.getenv("MESSAGE_ARCHIVE_INTERVAL", "86400")
+    )
+    MESSAGE_ARCHIVE_BATCH_SIZE: int = int(
+        os.getenv("MESSAGE_ARCHIVE_BATCH_SIZE", "5000")
+    )
+    # the newest page is looked for in this window before older partitions
+    MESSAGE_RECENT_WINDOW_DAYS: int = int(
+        os.getenv("MESSAGE_RECENT_WINDOW_DAYS", "31")
+    )
+    # seconds a message id may be older than its created_at, bounds page queries
+    MESSAGE_CLOCK_SKEW: float = float(os.getenv("MESSAGE_CLOCK_SKEW", "300"))
+
+    # Streaming chat history export
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+    EXPORT_GZIP_LEVEL: int = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+    # Message attachments, uploaded in resumable chunks
+    ATTACHMENT_DIR: str = os.getenv("ATTACHMENT_DIR", "/app/attachments")
+    ATTACHMENT_MAX_SIZE: int = int(os.getenv("ATTACHMENT_MAX_SIZE", str(100 << 20)))
+    # the most one request may carry, clients send smaller chunks on bad networks
+    ATTACHMENT_CHUNK_SIZE: int = int(os.getenv("ATTACHMENT_CHUNK_SIZE", str(8 << 20)))
+    # unfinished uploads untouched for this many seconds are removed
+    ATTACHMENT_UPLOAD_TTL: float = float(os.getenv("ATTACHMENT_UPLOAD_TTL", "86400"))
+    ATTACHMENT_SWEEP_INTERVAL: float = float(
+        os.getenv("ATTACHMENT_SWEEP_INTERVAL", "3600")
+    )
+
+    # Buffered last seen / read receipt writes
+    ACTIVITY_FLUSH_INTERVAL: float = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "5.0"))
+
+    # Bulk user import
+    USER_IMPORT_BATCH_SIZE: int = int(os.getenv("USER_IMPORT_BATCH_SIZE", "1000"))
+    # longer lines are reported as row errors and skipped, not buffered
+    USER_IMPORT_MAX_LINE: int = int(os.getenv("USER_IMPORT_MAX_LINE", "65536"))
+
+    # Users search, "typesense" or "postgres" (pg_trgm)
+    SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "typesense")
+    SEARCH_TRGM_THRESHOLD: float = float(os.getenv("SEARCH_TRGM_THRESHOLD", "0.3"))
+    SEARCH_INDEX_BATCH_SIZE: int = int(os.getenv("SEARCH_INDEX_BATCH_SIZE", "1000"))
+    # seconds between drift repairs, 0 disables them
+    SEARCH_RECONCILE_INTERVAL: float = float(
+        os.getenv("SEARCH_RECONCILE_INTERVAL", "600")
+    )
+
+    # Prometheus scrapes /metrics with "Authorization: Bearer <token>", the
+    # endpoint answers 404 while no token is set
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+
+    # SQL accounting
+    SQL_SLOW_QUERY_THRESHOLD: float = float(
+        os.getenv("SQL_SLOW_QUERY_THRESHOLD", "0.2")
+    )
+    # the same statement this many times in one request is reported as N+1
+    SQL_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    # statements allowed per request, exceeding it fails the request; for tests
+    SQL_QUERY_BUDGET: int = int(os.getenv("SQL_QUERY_BUDGET", "0"))
+    # statement counts and DB time in a Server-Timing header; for debugging,
+    # every client can read it
+    SQL_SERVER_TIMING: bool = os.getenv("SQL_SERVER_TIMING", "false") == "true"
+
+    # Tracing
+    # none, file or otlp
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_SAMPLE_RATIO: float = float(os.getenv("TRACE_SAMPLE_RATIO", "0.1"))
+    TRACE_OTLP_ENDPOINT: str = os.getenv(
+        "TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+    )
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "traces.jsonl")
+    TRACE_SERVICE_NAME: str = os.getenv("TRACE_SERVICE_NAME", "abilgram-backend")
+
+    # Event loop monitoring
+    LOOP_MONITOR_INTERVAL: float = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.25"))
+    LOOP_BLOCK_THRESHOLD: float = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))
+    # logs the stack of callbacks that block the loop, for staging and debugging
+    LOOP_BLOCK_CAPTURE_STACKS: bool = (
+        os.getenv("LOOP_BLOCK_CAPTURE_STACKS", "false") == "true"
+    )
+
+    # Logging
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # json or text
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    # records beyond this many waiting for the writer thread are dropped
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # share of the info records kept per socket event, warnings are never sampled
+    LOG_SOCKET_SAMPLE_RATES: str = os.getenv(
+        "LOG_SOCKET_SAMPLE_RATES",
+        "connect=0.1,disconnect=0.1,set_user_id=0.1,chat=0.1,"
+        "get_online_users=0.01,message=0.01",
+    )
+    # records kept per socket event and second, at any level
+    LOG_SOCKET_EVENT_RATE: int = int(os.getenv("LOG_SOCKET_EVENT_RATE", "20"))
+
+    # Request profiler, off unless a token or a sample rate is set
+    # requests sending this value in X-Profile are profiled
+    PROFILER_TOKEN: str = os.getenv("PROFILER_TOKEN", "")
+    PROFILER_SAMPLE_RATE: float = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+    # sampling is limited to paths starting with this
+    PROFILER_PATH_PREFIX: str = os.getenv("PROFILER_PATH_PREFIX", "/api/")
+    PROFILER_INTERVAL: float = float(os.getenv("PROFILER_INTERVAL", "0.001"))
+    PROFILER_DIR: str = os.getenv("PROFILER_DIR", "profiles")
+    PROFILER_MAX_FILES: int = int(os.getenv("PROFILER_MAX_FILES", "100"))
+
+    # Startup
+    STARTUP_CHECK_TIMEOUT: float = float(os.getenv("STARTUP_CHECK_TIMEOUT", "10"))
+    STARTUP_RETRY_MAX_INTERVAL: float = float(
+        os.getenv("STARTUP_RETRY_MAX_INTERVAL", "30")
+    )
+    DB_WARM_CONNECTIONS: int = int(os.getenv("DB_WARM_CONNECTIONS", "5"))
+
+    # Shutdown
+    SHUTDOWN_DRAIN_TIMEOUT: float = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))
+    # clients are told to reconnect after a random delay up to this many seconds
+    SHUTDOWN_RECONNECT_JITTER: float = float(
+        os.getenv("SHUTDOWN_RECONNECT_JITTER", "10")
+    )
+
     # CORS
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "http://localhost:3567").split(
         ","
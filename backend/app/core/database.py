@@ -1,26 +1,45 @@
 import asyncio
+import contextvars
 import logging
 import traceback
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Dict, Optional
 
+from app.core.metrics import instrument_engine
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (AsyncSession, async_scoped_session,
                                     async_sessionmaker, create_async_engine)
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+_current_unit_of_work: ContextVar[Optional["UnitOfWork"]] = ContextVar(
+    "current_unit_of_work", default=None
+)
+
+
+def outside_unit_of_work() -> contextvars.Context:
+    # the caller's context, tracing included, minus its unit of work; for work
+    # started by one request that serves others too
+    context = contextvars.copy_context()
+    context.run(_current_unit_of_work.set, None)
+    return context
+
 
 class Database:
     def __init__(self, db_url: str) -> None:
         self._engine = create_async_engine(db_url)
+        instrument_engine(self._engine.sync_engine)
+        self._session_maker = async_sessionmaker(
+            autocommit=False,
+            expire_on_commit=False,
+            autoflush=False,
+            bind=self._engine,
+        )
         self._session_factory = async_scoped_session(
-            async_sessionmaker(
-                autocommit=False,
-                expire_on_commit=False,
-                autoflush=False,
-                bind=self._engine,
-            ),
+            self._session_maker,
             scopefunc=asyncio.current_task,
         )
 
@@ -30,8 +49,44 @@ class Database:
         async with self._engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
 
+    async def warm_up(self, connections: int) -> None:
+        async def ping():
+            async with self._engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        # opened side by side so they all stay in the pool afterwards
+        await asyncio.gather(*(ping() for _ in range(connections)))
+
+    def pool_status(self) -> Dict[str, int]:
+        pool = self._engine.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
+    async def dispose(self) -> None:
+        await self._session_factory.remove()
+        await self._engine.dispose()
+
+    @asynccontextmanager
+    async def driver_connection(self) -> AsyncGenerator[Any, None]:
+        # the asyncpg connection itself, for LISTEN and other driver features
+        async with self._engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            yield raw.driver_connection
+
+    def unit_of_work(self) -> "UnitOfWork":
+        return UnitOfWork(self._session_maker)
+
     @asynccontextmanager
     async def session(self) -> AsyncGenerator[AsyncSession, None]:
+        unit_of_work = _current_unit_of_work.get()
+        if unit_of_work is not None and unit_of_work.session is not None:
+            yield unit_of_work.session
+            return
+
         session: AsyncSession = self._session_factory()
         try:
             yield session
@@ -42,3 +97,41 @@ class Database:
             logging.error(traceback.format_exc())
         finally:
             await session.close()
+
+
+class UnitOfWork:
+    def __init__(self, session_maker: async_sessionmaker) -> None:
+        self._session_maker = session_maker
+        self.session: Optional[AsyncSession] = None
+        self._owner = False
+
+    async def __aenter__(self) -> AsyncSession:
+        outer = _current_unit_of_work.get()
+        if outer is not None and outer.session is not None:
+            # nested units of work join the outer transaction
+            self.session = outer.session
+            return self.session
+
+        self._owner = True
+        self.session = self._session_maker()
+        await self.session.begin()
+        self._token = _current_unit_of_work.set(self)
+        return self.session
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if not self._owner:
+            return
+
+        session, self.session = self.session, None
+        try:
+            if exc_type is None:
+                await session.commit()
+            else:
+                await session.rollback()
+        finally:
+            try:
+                _current_unit_of_work.reset(self._token)
+            except ValueError:
+                # exited from a copied context, the original one is gone anyway
+                pass
+            await session.close()
@@ -1,13 +1,30 @@
 from app.application.socket_io import sio
 from app.core.config import settings
 from app.core.database import Database
+from app.domain.services.single_flight import SingleFlight
+from app.infrastructure.activity import ActivityBuffer
+from app.infrastructure.attachment_files import UploadSweeper
+from app.infrastructure.loaders import UserBatchLoader, UserLoader
+from app.infrastructure.message_archive import MessageArchiveStore
+from app.infrastructure.message_buffer import MessageRingBuffer
+from app.infrastructure.presence_store import PresenceStore
+from app.infrastructure.rate_limit import RateLimiter
+from app.infrastructure.repositories.attachment_repository import \
+    AttachmentRepository
 from app.infrastructure.repositories.chat_repository import ChatRepository
 from app.infrastructure.repositories.message_repository import \
     MessageRepository
+from app.infrastructure.repositories.presence_repository import \
+    PresenceRepository
 from app.infrastructure.repositories.user_repository import UserRepository
+from app.infrastructure.search.postgres_backend import PostgresSearchBackend
+from app.infrastructure.search.typesense_backend import TypesenseSearchBackend
+from app.infrastructure.services.attachment_service import \
+    AttachmentService
 from app.infrastructure.services.chat_service import ChatService
 from app.infrastructure.services.message_service import MessageService
 from app.infrastructure.services.user_service import UserService
+from app.infrastructure.user_index import UserSearchIndex
 from dependency_injector import containers, providers
 
 
@@ -17,11 +34,15 @@ class Container(containers.DeclarativeContainer):
             "app.application.api.v1.endpoints.user",
             "app.application.api.v1.endpoints.chat",
             "app.application.api.v1.endpoints.message",
+            "app.application.api.v1.endpoints.socket",
+            "app.application.api.v1.endpoints.attachment",
         ]
     )
 
     database = providers.Singleton(Database, db_url=settings.async_database_url)
 
+    unit_of_work = database.provided.unit_of_work.call()
+
     user_repository = providers.Factory(
         UserRepository, session_factory=database.provided.session
     )
@@ -34,8 +55,76 @@ class Container(containers.DeclarativeContainer):
         MessageRepository, session_factory=database.provided.session
     )
 
-    user_service = providers.Factory(UserService, repository=user_repository)
-    chat_service = providers.Factory(ChatService, repository=chat_repository, sio=sio)
+    message_archive = providers.Singleton(
+        MessageArchiveStore, repository=message_reository, database=database
+    )
+
+    attachment_repository = providers.Factory(
+        AttachmentRepository, session_factory=database.provided.session
+    )
+    upload_sweeper = providers.Singleton(
+        UploadSweeper, repository=attachment_repository
+    )
+
+    presence_repository = providers.Factory(
+        PresenceRepository, session_factory=database.provided.session
+    )
+    presence_store = providers.Singleton(
+        PresenceStore, repository=presence_repository, database=database
+    )
+
+    activity_buffer = providers.Singleton(
+        ActivityBuffer,
+        user_repository=user_repository,
+        chat_repository=chat_repository,
+    )
+
+    search_backend = providers.Selector(
+        providers.Object(settings.SEARCH_BACKEND),
+        typesense=providers.Singleton(TypesenseSearchBackend),
+        postgres=providers.Singleton(
+            PostgresSearchBackend, repository=user_repository
+        ),
+    )
+    user_search_index = providers.Singleton(
+        UserSearchIndex, repository=user_repository
+    )
+
+    rate_limiter = providers.Singleton(RateLimiter)
+
+    message_buffer = providers.Singleton(MessageRingBuffer)
+
+    user_batch_loader = providers.Singleton(UserBatchLoader, repository=user_repository)
+    user_loader = providers.Factory(UserLoader, batch_loader=user_batch_loader)
+
+    single_flight = providers.Singleton(SingleFlight)
+
+    user_service = providers.Factory(
+        UserService,
+        repository=user_repository,
+        single_flight=single_flight,
+        search_backend=search_backend,
+    )
+    chat_service = providers.Factory(
+        ChatService,
+        repository=chat_repository,
+        sio=sio,
+        message_buffer=message_buffer,
+        user_loader=user_loader,
+        single_flight=single_flight,
+    )
     message_service = providers.Factory(
-        MessageService, repository=message_reository, sio=sio
+        MessageService,
+        repository=message_reository,
+        sio=sio,
+        buffer=message_buffer,
+        archive=message_archive,
+        attachment_repository=attachment_repository,
+        unit_of_work=database.provided.unit_of_work,
+        single_flight=single_flight,
+    )
+    attachment_service = providers.Factory(
+        AttachmentService,
+        repository=attachment_repository,
+        single_flight=single_flight,
     )
@@ -0,0 +1,152 @@
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+# attributes every LogRecord has, anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional["BackgroundHandler"] = None
+_sampler: Optional["EventSampler"] = None
+
+
+def fields(record: logging.LogRecord) -> Dict:
+    return {
+        key: value
+        for key, value in vars(record).items()
+        if key not in _RECORD_ATTRIBUTES
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extra = " ".join(f"{key}={value}" for key, value in fields(record).items())
+        return f"{line} {extra}" if extra else line
+
+
+class BackgroundHandler(QueueHandler):
+    def __init__(self, records: queue.Queue) -> None:
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # unlike QueueHandler.prepare, the message is left for the listener thread
+        # to format, only tracebacks are rendered while their frames still exist
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# samples and rate limits the records tagged with an event field
+class EventSampler(logging.Filter):
+    def __init__(self, rates: Dict[str, float], per_second: int) -> None:
+        super().__init__()
+        self.rates = rates
+        self.per_second = per_second
+        self._windows: Dict[str, list] = {}
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None:
+            return True
+
+        if record.levelno < logging.WARNING:
+            rate = self.rates.get(event, 1.0)
+            if rate < 1.0 and random.random() >= rate:
+                self.suppressed += 1
+                return False
+
+        now = int(time.monotonic())
+        window = self._windows.get(event)
+        if window is None or window[0] != now:
+            window = self._windows[event] = [now, 0]
+        window[1] += 1
+        if window[1] > self.per_second:
+            self.suppressed += 1
+            return False
+        return True
+
+
+def parse_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, value.split(",")):
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = float(rate)
+    return rates
+
+
+def configure_logging() -> None:
+    global _listener, _handler, _sampler
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(
+        JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter()
+    )
+    records: queue.Queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+    _listener = QueueListener(records, stream)
+    _listener.start()
+
+    _handler = BackgroundHandler(records)
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    root.addHandler(_handler)
+
+    _sampler = EventSampler(
+        parse_rates(settings.LOG_SOCKET_SAMPLE_RATES), settings.LOG_SOCKET_EVENT_RATE
+    )
+    logging.getLogger("app.infrastructure.ws_routes").addFilter(_sampler)
+
+
+def shutdown_logging() -> None:
+    global _listener, _handler
+    if _listener is None:
+        return
+
+    # whatever is still queued is written before the listener thread exits
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()
+    _listener = _handler = None
+
+
+def stats() -> Dict[str, int]:
+    return {
+        "dropped": _handler.dropped if _handler is not None else 0,
+        "suppressed": _sampler.suppressed if _sampler is not None else 0,
+    }
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Callable, TypeVar
+
+from app.core import query_stats
+from app.core.tracing import record_error, tracer
+from opentelemetry.trace import SpanKind
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typesense.exceptions import ObjectNotFound
+
+T = TypeVar("T")
+
+FAST_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+DB_STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+)
+DB_STATEMENT_ERRORS = Counter(
+    "db_statement_errors_total", "SQL statements that raised", ["operation"]
+)
+TYPESENSE_REQUEST_SECONDS = Histogram(
+    "typesense_request_duration_seconds",
+    "Typesense call latency",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+)
+TYPESENSE_ERRORS = Counter(
+    "typesense_errors_total", "Typesense calls that raised", ["operation"]
+)
+SOCKET_EVENT_SECONDS = Histogram(
+    "socketio_event_duration_seconds",
+    "Socket.IO event handler latency",
+    ["event"],
+    buckets=FAST_BUCKETS,
+)
+SOCKET_EMITS = Counter("socketio_emits_total", "Socket.IO emits", ["event"])
+REQUEST_DB_STATEMENTS = Histogram(
+    "request_db_statements",
+    "SQL statements run while handling one request or socket event",
+    ["route"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a loop callback was due and when it ran",
+    buckets=FAST_BUCKETS,
+)
+LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total", "Times the event loop stalled past the threshold"
+)
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+def sql_operation(statement: str) -> str:
+    keyword = statement.lstrip()[:6].upper().rstrip()
+    return keyword if keyword in SQL_OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context._span = tracer.start_span(
+            sql_operation(statement),
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "postgresql",
+                "db.statement": query_stats.shape(statement),
+            },
+        )
+        context._started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        elapsed = time.perf_counter() - context._started_at
+        DB_STATEMENT_SECONDS.labels(sql_operation(statement)).observe(elapsed)
+        query_stats.record(statement, parameters, elapsed)
+        context._span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        DB_STATEMENT_ERRORS.labels(
+            sql_operation(exception_context.statement or "")
+        ).inc()
+        span = getattr(exception_context.execution_context, "_span", None)
+        if span is not None:
+            record_error(span, exception_context.original_exception)
+            span.end()
+
+
+async def observe_typesense(operation: str, fn: Callable[..., T], *args) -> T:
+    started_at = time.perf_counter()
+    # lookups of missing documents are expected, they do not mark the span failed
+    with tracer.start_as_current_span(
+        f"typesense {operation}",
+        kind=SpanKind.CLIENT,
+        record_exception=False,
+        set_status_on_exception=False,
+    ) as span:
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except ObjectNotFound:
+            raise
+        except Exception as e:
+            TYPESENSE_ERRORS.labels(operation).inc()
+            record_error(span, e)
+            raise
+        finally:
+            TYPESENSE_REQUEST_SECONDS.labels(operation).observe(
+                time.perf_counter() - started_at
+            )
@@ -0,0 +1,100 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDERS = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    __slots__ = ("name", "budget", "count", "db_time", "shapes")
+
+    def __init__(self, name: str, budget: int = 0) -> None:
+        self.name = name
+        self.budget = budget
+        self.count = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.db_time += elapsed
+        self.shapes[shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(s, n) for s, n in self.shapes.most_common() if n >= threshold]
+
+    def check_budget(self) -> None:
+        if self.budget and self.count > self.budget:
+            raise QueryBudgetExceeded(
+                f"{self.name} ran {self.count} SQL statements, "
+                f"the budget is {self.budget}"
+            )
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def shape(statement: str) -> str:
+    # expanding IN lists differ only in their number of placeholders
+    return _PLACEHOLDERS.sub("?", _WHITESPACE.sub(" ", statement).strip())
+
+
+def redact(parameters) -> str:
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return f"<{len(parameters)} rows>"
+        return "(" + ", ".join(f"<{type(p).__name__}>" for p in parameters) + ")"
+    if isinstance(parameters, dict):
+        items = (f"{key}: <{type(value).__name__}>" for key, value in parameters.items())
+        return "{" + ", ".join(items) + "}"
+    return f"<{type(parameters).__name__}>"
+
+
+@contextmanager
+def query_scope(
+    name: str, budget: int = settings.SQL_QUERY_BUDGET
+) -> Iterator[QueryStats]:
+    stats = QueryStats(name, budget)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        report(stats)
+
+
+def report(stats: QueryStats) -> None:
+    for statement_shape, count in stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD):
+        logger.warning(
+            f"Possible N+1 in {stats.name}: {count} times {statement_shape[:300]}"
+        )
+    logger.debug(
+        f"{stats.name}: {stats.count} SQL statements, "
+        f"{stats.db_time * 1000:.1f}ms in the database"
+    )
+
+
+def record(statement: str, parameters, elapsed: float) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed >= settings.SQL_SLOW_QUERY_THRESHOLD:
+        logger.warning(
+            f"Slow query {elapsed * 1000:.1f}ms: {shape(statement)[:500]} "
+            f"params={redact(parameters)}"
+        )
@@ -0,0 +1,93 @@
+import functools
+import inspect
+import logging
+from typing import Mapping, Optional
+
+from app.core.config import settings
+from opentelemetry import context, trace
+from opentelemetry.trace import Span, Status, StatusCode
+from opentelemetry.trace.propagation.tracecontext import \
+    TraceContextTextMapPropagator
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+
+tracer = trace.get_tracer("abilgram")
+propagator = TraceContextTextMapPropagator()
+
+
+def configure_tracing() -> None:
+    if settings.TRACE_EXPORTER == "none":
+        return
+
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (BatchSpanProcessor,
+                                                ConsoleSpanExporter)
+    from opentelemetry.sdk.trace.sampling import (ParentBased,
+                                                  TraceIdRatioBased)
+
+    if settings.TRACE_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import \
+            OTLPSpanExporter
+
+        exporter = OTLPSpanExporter(endpoint=settings.TRACE_OTLP_ENDPOINT)
+    else:
+        exporter = ConsoleSpanExporter(
+            out=open(settings.TRACE_FILE, "a", buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+
+    provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: settings.TRACE_SERVICE_NAME}),
+        # a sampled REST write keeps the socket events that continue it
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACE_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    logger.info(
+        f"Tracing {settings.TRACE_SAMPLE_RATIO:.0%} of traces "
+        f"to {settings.TRACE_EXPORTER}"
+    )
+
+
+def shutdown_tracing() -> None:
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+def extract(carrier: Mapping[str, str]) -> Optional[context.Context]:
+    if not isinstance(carrier.get(TRACEPARENT), str):
+        return None
+    return propagator.extract(carrier)
+
+
+def current_traceparent() -> Optional[str]:
+    carrier = {}
+    propagator.inject(carrier)
+    return carrier.get(TRACEPARENT)
+
+
+def record_error(span: Span, error: BaseException) -> None:
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+
+
+def traced(cls):
+    # every public coroutine of the class gets a span named after the runtime class
+    for name, fn in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(fn):
+            continue
+        setattr(cls, name, _traced_method(fn))
+    return cls
+
+
+def _traced_method(fn):
+    @functools.wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        with tracer.start_as_current_span(f"{type(self).__name__}.{fn.__name__}"):
+            return await fn(self, *args, **kwargs)
+
+    return wrapper
@@ -1,6 +1,5 @@
 from app.core.config import settings
 from typesense import Client
-from typesense.exceptions import ObjectAlreadyExists
 
 client = Client(
     {
@@ -24,10 +23,8 @@ UserSchema = {
         {"name": "email", "type": "string"},
         {"name": "avatar_url", "type": "string", "optional": True},
         {"name": "supertokens_id", "type": "string"},
+        # users.id, lets reconciliation walk the index in windows
+        {"name": "pk", "type": "int64"},
+        {"name": "updated_at", "type": "int64", "optional": True},
     ],
 }
-
-try:
-    client.collections.create(UserSchema)
-except ObjectAlreadyExists:
-    pass
@@ -1 +1,2 @@
-from app.domain.models import association_tables, chat, message, user
+from app.domain.models import (association_tables, attachment, chat, message,
+                               message_archive, presence, user)
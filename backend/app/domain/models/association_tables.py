@@ -8,4 +8,5 @@ chat_members = Table(
         "supertokens_id", String, ForeignKey("users.supertokens_id", ondelete="CASCADE")
     ),
     Column("chat_id", Integer, ForeignKey("chats.id", ondelete="CASCADE")),
+    Column("last_read_message_id", Integer, nullable=True),
 )
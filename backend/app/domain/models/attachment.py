@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Optional
+
+from app.domain.models.base import Base
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+# a stored file, one row and one blob per distinct content; names and types
+# are per upload and per message, they differ between people sharing a blob
+class Attachment(Base):
+    __tablename__ = "attachments"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64), unique=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.now
+    )
+
+
+# a resumable upload, offset is how much of the file is on disk so far
+class AttachmentUpload(Base):
+    __tablename__ = "attachment_uploads"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    user_id: Mapped[str] = mapped_column(
+        String(255), ForeignKey("users.supertokens_id", ondelete="CASCADE"), index=True
+    )
+    sha256: Mapped[str] = mapped_column(String(64), index=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    content_type: Mapped[str] = mapped_column(String(255))
+    filename: Mapped[str] = mapped_column(String(255))
+    offset: Mapped[int] = mapped_column(BigInteger, default=0)
+    # set once the file is verified, uploads are kept as proof of ownership
+    attachment_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("attachments.id", ondelete="CASCADE"), nullable=True
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+
+
+# messages are partitioned and archived, so there is no foreign key to them
+class MessageAttachment(Base):
+    __tablename__ = "message_attachments"
+
+    message_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    attachment_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("attachments.id", ondelete="CASCADE"), primary_key=True
+    )
+    chat_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("chats.id", ondelete="CASCADE"), index=True
+    )
+    # as the sender's upload named it
+    content_type: Mapped[str] = mapped_column(String(255))
+    filename: Mapped[str] = mapped_column(String(255))
@@ -16,6 +16,7 @@ class Chat(Base):
         DateTime(timezone=True),
         default=datetime.now,
     )
+    version: Mapped[int] = mapped_column(Integer, default=0)
 
     messages: Mapped[List["Message"]] = relationship("Message", back_populates="chat")
     members: Mapped[List[User]] = relationship(
@@ -4,14 +4,19 @@ from typing import Optional
 from app.domain.models.base import Base
 from app.domain.models.chat import Chat
 from app.domain.models.user import User
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_chat_id_id", "chat_id", "id"),
+        # monthly partitions, see app.infrastructure.message_archive
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     chat_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("chats.id", ondelete="CASCADE")
     )
@@ -26,8 +31,10 @@ class Message(Base):
     # maybe for future use
     # is_edited: Mapped[bool] = mapped_column(Boolean, default=False)
     # is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
+    # the partition key has to be part of the primary key
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         default=datetime.now,
     )
     # edited_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
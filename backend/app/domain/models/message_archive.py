@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from app.domain.models.base import Base
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+# a messages partition that was moved out of the database into a file
+class MessageArchive(Base):
+    __tablename__ = "message_archives"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    partition: Mapped[str] = mapped_column(String(63), unique=True)
+    range_start: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    range_end: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    path: Mapped[str] = mapped_column(String(1024))
+    rows: Mapped[int] = mapped_column(Integer)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.now
+    )
+
+
+# where one chat's messages are inside an archive file, a gzip member of its own
+class MessageArchiveChat(Base):
+    __tablename__ = "message_archive_chats"
+
+    archive_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("message_archives.id", ondelete="CASCADE"), primary_key=True
+    )
+    chat_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("chats.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    offset: Mapped[int] = mapped_column(BigInteger)
+    length: Mapped[int] = mapped_column(BigInteger)
+    rows: Mapped[int] = mapped_column(Integer)
+    min_id: Mapped[int] = mapped_column(Integer)
+    max_id: Mapped[int] = mapped_column(Integer)
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from app.domain.models.base import Base
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+# one row per open socket connection, across every worker
+class PresenceConnection(Base):
+    __tablename__ = "presence_connections"
+
+    sid: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(255), index=True)
+    worker_id: Mapped[str] = mapped_column(String(128), index=True)
+    # pushed forward by the owning worker's heartbeat, rows of a dead worker lapse
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
@@ -18,6 +18,13 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=datetime.now
     )
+    # changes whenever a field mirrored into the search index changes
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.now
+    )
+    last_seen_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
 
     messages: Mapped[List["Message"]] = relationship("Message", back_populates="sender")
     chats: Mapped[List["Chat"]] = relationship(
@@ -1,8 +1,10 @@
-from contextlib import AbstractAsyncContextManager
-from typing import Callable, List, Optional, Type, TypeVar
+from contextlib import AbstractAsyncContextManager, nullcontext
+from typing import Callable, List, Optional, Sequence, Type, TypeVar
 
+from app.core.tracing import traced
 from fastapi import HTTPException
 from pydantic import BaseModel
+from sqlalchemy import delete, insert, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -12,6 +14,7 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+@traced
 class BaseRepository:
     def __init__(
         self,
@@ -21,10 +24,17 @@ class BaseRepository:
         self.session_factory = session_factory
         self.model = model
 
+    @staticmethod
+    def transaction(session: AsyncSession):
+        # inside a unit of work the request-wide transaction is already open
+        if session.in_transaction():
+            return nullcontext()
+        return session.begin()
+
     async def create(self, schema: CreateSchemaType) -> ModelType:
         try:
             async with self.session_factory() as session:
-                async with session.begin():
+                async with self.transaction(session):
                     db_obj = self.model(**schema.model_dump())
                     session.add(db_obj)
                     await session.flush()
@@ -56,7 +66,7 @@ class BaseRepository:
 
         try:
             async with self.session_factory() as session:
-                async with session.begin():
+                async with self.transaction(session):
                     stmt = (
                         select(self.model).where(self.model.id == id).with_for_update()
                     )
@@ -82,7 +92,7 @@ class BaseRepository:
     async def delete(self, id: int) -> bool:
         try:
             async with self.session_factory() as session:
-                async with session.begin():
+                async with self.transaction(session):
                     stmt = (
                         select(self.model).where(self.model.id == id).with_for_update()
                     )
@@ -98,3 +108,74 @@ class BaseRepository:
             raise HTTPException(
                 status_code=500, detail=f"error object deletion with id {id}"
             ) from e
+
+    async def create_many(
+        self, schemas: Sequence[CreateSchemaType]
+    ) -> List[ModelType]:
+        if not schemas:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.scalars(
+                        insert(self.model).returning(self.model),
+                        [schema.model_dump() for schema in schemas],
+                    )
+                    return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk creation error") from e
+
+    async def get_many(self, ids: Sequence[int]) -> List[ModelType]:
+        if not ids:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                stmt = select(self.model).where(self.model.id.in_(ids))
+                result = await session.execute(stmt)
+                return result.scalars().all()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error to get objects by ids"
+            ) from e
+
+    async def update_many(
+        self, ids: Sequence[int], schema: UpdateSchemaType
+    ) -> List[ModelType]:
+        update_data = schema.model_dump(exclude_unset=True)
+        if not ids or not update_data:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    stmt = (
+                        update(self.model)
+                        .where(self.model.id.in_(ids))
+                        .values(**update_data)
+                        .returning(self.model)
+                        .execution_options(synchronize_session=False)
+                    )
+                    result = await session.scalars(stmt)
+                    return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk update error") from e
+
+    async def delete_many(self, ids: Sequence[int]) -> List[int]:
+        if not ids:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    stmt = (
+                        delete(self.model)
+                        .where(self.model.id.in_(ids))
+                        .returning(self.model.id)
+                        .execution_options(synchronize_session=False)
+                    )
+                    result = await session.scalars(stmt)
+                    return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk deletion error") from e
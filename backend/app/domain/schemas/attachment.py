@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class AttachmentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    sha256: str
+    size: int
+    content_type: str
+    filename: str
+
+    @classmethod
+    def named(cls, attachment, source) -> "AttachmentResponse":
+        # the content is shared, the name and type come from the upload or the
+        # message the user got it through
+        return cls(
+            id=attachment.id,
+            sha256=attachment.sha256,
+            size=attachment.size,
+            content_type=source.content_type,
+            filename=source.filename,
+        )
+
+
+class UploadCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., ge=1)
+    sha256: str = Field(..., pattern=r"^[0-9a-f]{64}$")
+    content_type: str = Field("application/octet-stream", max_length=255)
+
+
+class UploadResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    size: int
+    offset: int
+    chunk_size: int
+    expires_at: datetime
+    # set once the upload is complete, right away if the content was known
+    attachment: Optional[AttachmentResponse] = None
@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
+from app.domain.schemas.attachment import AttachmentResponse
 from pydantic import BaseModel, ConfigDict
 
 
@@ -20,3 +21,5 @@ class MessageResponse(MessageBase):
     chat_id: int
     sender_id: Optional[str]
     created_at: datetime
+    # filled in by MessageService
+    attachments: List[AttachmentResponse] = []
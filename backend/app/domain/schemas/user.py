@@ -25,3 +25,4 @@ class UserResponse(UserBase):
 
     id: int
     created_at: datetime
+    last_seen_at: Optional[datetime] = None
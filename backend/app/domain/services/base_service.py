@@ -1,5 +1,7 @@
-from typing import Generic, List, Optional, TypeVar
+from typing import Generic, List, Optional, Sequence, TypeVar
 
+from app.core.tracing import traced
+from app.domain.services.single_flight import SingleFlight
 from fastapi import HTTPException
 from pydantic import BaseModel
 
@@ -9,11 +11,15 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 RepositoryType = TypeVar("RepositoryType")
 
 
+@traced
 class BaseService(
     Generic[ModelType, CreateSchemaType, UpdateSchemaType, RepositoryType]
 ):
-    def __init__(self, repository: RepositoryType) -> None:
+    def __init__(
+        self, repository: RepositoryType, single_flight: Optional[SingleFlight] = None
+    ) -> None:
         self.repository = repository
+        self.single_flight = single_flight or SingleFlight()
 
     async def create(self, schema: CreateSchemaType) -> ModelType:
         try:
@@ -37,7 +43,10 @@ class BaseService(
 
     async def get(self, id: int) -> Optional[ModelType]:
         try:
-            obj = await self.repository.get(id)
+            obj = await self.single_flight.do(
+                ("get", self.repository.model.__name__, id),
+                lambda: self.repository.get(id),
+            )
             if not obj:
                 raise HTTPException(
                     status_code=404, detail=f"object with id {id} not found"
@@ -80,6 +89,50 @@ class BaseService(
                 status_code=500, detail=f"Error while deleting object: {str(e)}"
             )
 
+    async def create_many(
+        self, schemas: Sequence[CreateSchemaType]
+    ) -> List[ModelType]:
+        try:
+            return await self.repository.create_many(schemas) or []
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Can't create objects: {str(e)}"
+            )
+
+    async def get_many(self, ids: Sequence[int]) -> List[ModelType]:
+        try:
+            return await self.repository.get_many(ids) or []
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error to get objects: {str(e)}"
+            )
+
+    async def update_many(
+        self, ids: Sequence[int], schema: UpdateSchemaType
+    ) -> List[ModelType]:
+        try:
+            return await self.repository.update_many(ids, schema) or []
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error while updating objects: {str(e)}"
+            )
+
+    async def delete_many(self, ids: Sequence[int]) -> List[int]:
+        try:
+            return await self.repository.delete_many(ids) or []
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error while deleting objects: {str(e)}"
+            )
+
     async def exists(self, id: int) -> bool:
         obj = await self.repository.get(id)
         return obj is not None
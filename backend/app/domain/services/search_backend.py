@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from app.domain.models.user import User
+
+
+class SearchBackend(ABC):
+    async def prepare(self) -> None:
+        pass
+
+    @abstractmethod
+    async def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Users whose username starts with or nearly matches the query, best first."""
+
+    @abstractmethod
+    async def index(self, users: List[User]) -> List[Optional[str]]:
+        """Make the users searchable, returns an error or None per user."""
+
+    @abstractmethod
+    async def remove(self, ids: List[int]) -> None:
+        """Stop finding the users with these ids."""
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.database import outside_unit_of_work
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            # the call serves several requests, so it must not run inside the
+            # leader's context (unit of work) or die with the leader's cancellation
+            task = asyncio.get_running_loop().create_task(
+                fn(), context=outside_unit_of_work()
+            )
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # mark the exception as retrieved when every caller went away
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.infrastructure.repositories.chat_repository import ChatRepository
+from app.infrastructure.repositories.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        chat_repository: ChatRepository,
+        interval: float = settings.ACTIVITY_FLUSH_INTERVAL,
+    ) -> None:
+        self.user_repository = user_repository
+        self.chat_repository = chat_repository
+        self._interval = interval
+        self._last_seen: Dict[str, datetime] = {}
+        self._last_read: Dict[Tuple[int, str], int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def touch(self, user_id: str, at: Optional[datetime] = None) -> None:
+        self._last_seen[user_id] = at or datetime.now(timezone.utc)
+
+    def mark_read(self, chat_id: int, user_id: str, message_id: int) -> None:
+        key = (chat_id, user_id)
+        if message_id > self._last_read.get(key, 0):
+            self._last_read[key] = message_id
+
+    @property
+    def pending(self) -> int:
+        return len(self._last_seen) + len(self._last_read)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            last_seen, self._last_seen = self._last_seen, {}
+            last_read, self._last_read = self._last_read, {}
+
+            try:
+                await self.user_repository.bulk_update_last_seen(last_seen)
+            except Exception as e:
+                logger.error(f"Failed to flush last seen timestamps: {e}")
+                for user_id, at in last_seen.items():
+                    self._last_seen.setdefault(user_id, at)
+
+            try:
+                await self.chat_repository.bulk_update_last_read(last_read)
+            except Exception as e:
+                logger.error(f"Failed to flush read receipts: {e}")
+                for key, message_id in last_read.items():
+                    self.mark_read(*key, message_id)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
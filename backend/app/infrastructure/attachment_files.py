@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.infrastructure.repositories.attachment_repository import \
+    AttachmentRepository
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1 << 20
+
+
+def upload_path(upload_id: str) -> Path:
+    return Path(settings.ATTACHMENT_DIR) / "uploads" / upload_id
+
+
+# content addressed, a file uploaded any number of times is stored once
+def blob_path(sha256: str) -> Path:
+    return Path(settings.ATTACHMENT_DIR) / "blobs" / sha256[:2] / sha256
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while data := f.read(READ_SIZE):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def truncate(path: Path) -> None:
+    with open(path, "r+b") as f:
+        f.truncate(0)
+
+
+def publish(path: Path, sha256: str) -> None:
+    blob = blob_path(sha256)
+    if blob.exists():
+        path.unlink(missing_ok=True)
+        return
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    path.replace(blob)
+
+
+# removes uploads that were abandoned before they completed
+class UploadSweeper:
+    def __init__(
+        self,
+        repository: AttachmentRepository,
+        interval: float = settings.ATTACHMENT_SWEEP_INTERVAL,
+    ) -> None:
+        self.repository = repository
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> int:
+        upload_ids = await self.repository.delete_expired_uploads() or []
+        for upload_id in upload_ids:
+            await asyncio.to_thread(upload_path(upload_id).unlink, missing_ok=True)
+        return len(upload_ids)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                removed = await self.sweep()
+                if removed:
+                    logger.info(f"Removed {removed} abandoned uploads")
+            except Exception as e:
+                logger.error(f"Failed to remove abandoned uploads: {e}")
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from app.core.database import outside_unit_of_work
+from app.domain.models.user import User
+from app.infrastructure.repositories.user_repository import UserRepository
+from sqlalchemy import inspect
+
+
+class UserBatchLoader:
+    def __init__(self, repository: UserRepository) -> None:
+        self.repository = repository
+        self._queue: Dict[str, List[asyncio.Future]] = {}
+        self._scheduled = False
+        self.batches = 0
+        self.requested = 0
+
+    def load(self, supertokens_id: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.setdefault(supertokens_id, []).append(future)
+        self.requested += 1
+
+        if not self._scheduled:
+            self._scheduled = True
+            # dispatch after every caller of this tick has queued its ids, outside
+            # of any request's unit of work since the batch serves several requests
+            loop.call_soon(self._dispatch, context=outside_unit_of_work())
+        return future
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, {}
+        self._scheduled = False
+        asyncio.create_task(self._resolve(queue))
+
+    async def _resolve(self, queue: Dict[str, List[asyncio.Future]]) -> None:
+        self.batches += 1
+        try:
+            users = await self.repository.get_many_by_supertokens_ids(list(queue))
+        except Exception as e:
+            for futures in queue.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        by_id = {user.supertokens_id: user for user in users or []}
+        for supertokens_id, futures in queue.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(by_id.get(supertokens_id))
+
+
+class UserLoader:
+    def __init__(self, batch_loader: UserBatchLoader) -> None:
+        self.batch_loader = batch_loader
+        self._cache: Dict[str, asyncio.Future] = {}
+
+    async def load(self, supertokens_id: str) -> Optional[User]:
+        future = self._cache.get(supertokens_id)
+        if future is None:
+            future = self._cache[supertokens_id] = self.batch_loader.load(
+                supertokens_id
+            )
+        user = await future
+        return self._copy(user) if user is not None else None
+
+    async def load_many(self, supertokens_ids: Iterable[str]) -> Dict[str, User]:
+        ids = list(dict.fromkeys(supertokens_ids))
+        users = await asyncio.gather(*(self.load(id) for id in ids))
+        return {id: user for id, user in zip(ids, users) if user is not None}
+
+    @staticmethod
+    def _copy(user: User) -> User:
+        # the loaded instance is shared by every request in the batch, each
+        # caller gets a detached one of its own to attach to its objects
+        return User(
+            **{
+                attribute.key: getattr(user, attribute.key)
+                for attribute in inspect(User).column_attrs
+            }
+        )
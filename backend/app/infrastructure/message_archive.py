@@ -0,0 +1,305 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.database import Database
+from app.domain.models.message import Message
+from app.infrastructure.repositories.message_repository import (
+    MessageRepository, Partition)
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^messages_y(\d{4})m(\d{2})$")
+
+READ_SIZE = 1 << 16
+
+
+def month_start(at: datetime) -> datetime:
+    at = at.astimezone(timezone.utc) if at.tzinfo else at.replace(tzinfo=timezone.utc)
+    return at.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start: datetime) -> datetime:
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def partition_for(start: datetime) -> Partition:
+    return f"messages_y{start.year:04d}m{start.month:02d}", start, next_month(start)
+
+
+def parse_partition(name: str) -> Optional[Partition]:
+    match = PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    year, month = map(int, match.groups())
+    return partition_for(datetime(year, month, 1, tzinfo=timezone.utc))
+
+
+def _encode(message: Message) -> Dict:
+    return {
+        "id": message.id,
+        "chat_id": message.chat_id,
+        "sender_id": message.sender_id,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def _decode(row: Dict) -> Message:
+    return Message(**{**row, "created_at": datetime.fromisoformat(row["created_at"])})
+
+
+def _read_member(path: str, offset: int, length: int) -> List[Dict]:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = gzip.decompress(f.read(length))
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def _iter_member(
+    path: str, offset: int, length: int, batch_size: int
+) -> Iterator[List[Dict]]:
+    # READ_SIZE bytes in and out at a time, however large the chat. The
+    # archive wrote the rows in id order, they come out that way
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    rows: List[Dict] = []
+    line = b""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        pending = b""
+        while remaining or pending:
+            if not pending:
+                pending = f.read(min(READ_SIZE, remaining))
+                if not pending:
+                    break
+                remaining -= len(pending)
+            data = decompressor.decompress(pending, READ_SIZE)
+            pending = decompressor.unconsumed_tail
+            *lines, line = (line + data).split(b"\n")
+            for complete in lines:
+                rows.append(json.loads(complete))
+                if len(rows) >= batch_size:
+                    yield rows
+                    rows = []
+    if line.strip():
+        rows.append(json.loads(line))
+    if rows:
+        yield rows
+
+
+def _compress(rows: List[Dict]) -> bytes:
+    return gzip.compress(
+        b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+    )
+
+
+# Keeps monthly partitions of messages ahead of time and moves old ones into
+# gzip files in MESSAGE_ARCHIVE_DIR. Every chat is a gzip member of its own, so
+# one chat's history is a seek and a small read, indexed by message_archive_chats.
+class MessageArchiveStore:
+    def __init__(
+        self,
+        repository: MessageRepository,
+        database: Database,
+        directory: str = settings.MESSAGE_ARCHIVE_DIR,
+        archive_after_days: int = settings.MESSAGE_ARCHIVE_AFTER_DAYS,
+        interval: float = settings.MESSAGE_ARCHIVE_INTERVAL,
+    ) -> None:
+        self.repository = repository
+        self.database = database
+        self.directory = Path(directory)
+        self.archive_after_days = archive_after_days
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_partitions(self) -> None:
+        if await self.repository.table_kind() != "p":
+            # converting a plain table copies every row under an exclusive
+            # lock, that is migration 0006 and not something to do while serving
+            raise RuntimeError("messages is not partitioned, run alembic upgrade head")
+        if not await self.repository.create_partitions(
+            self._months(datetime.now(timezone.utc))
+        ):
+            raise RuntimeError("could not create message partitions")
+
+    async def maintain(self) -> None:
+        await self.ensure_partitions()
+        if self.archive_after_days <= 0:
+            return
+
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.archive_after_days)
+        for name in await self.repository.list_partitions() or []:
+            partition = parse_partition(name)
+            if partition is not None and partition[2] <= cutoff:
+                await self.archive(partition)
+
+    async def archive(self, partition: Partition) -> bool:
+        # every worker runs maintain(), the lock is held from the first read to
+        # the drop so only one of them archives a partition
+        name = partition[0]
+        async with self.database.driver_connection() as connection:
+            if not await connection.fetchval(
+                "SELECT pg_try_advisory_lock(hashtext($1))", name
+            ):
+                return False
+            try:
+                if not await connection.fetchval(
+                    "SELECT to_regclass($1) IS NOT NULL", name
+                ):
+                    return False
+                return await self._archive(partition)
+            finally:
+                await connection.execute(
+                    "SELECT pg_advisory_unlock(hashtext($1))", name
+                )
+
+    async def _archive(self, partition: Partition) -> bool:
+        name, start, end = partition
+        # a name of its own per run, an existing archive is never overwritten
+        path = self.directory / f"{name}-{uuid.uuid4().hex[:12]}.ndjson.gz"
+        partial = path.with_name(f"{path.name}.partial")
+        await asyncio.to_thread(self.directory.mkdir, parents=True, exist_ok=True)
+
+        chats: List[Dict] = []
+        rows = 0
+        f = await asyncio.to_thread(open, partial, "wb")
+        try:
+            offset = 0
+            pending: List[Dict] = []
+            after = (0, 0)
+            while True:
+                batch = await self.repository.get_range_batch(
+                    start, end, after, settings.MESSAGE_ARCHIVE_BATCH_SIZE
+                )
+                if batch is None:
+                    raise RuntimeError(f"could not read {name}")
+
+                for message in batch:
+                    if pending and pending[-1]["chat_id"] != message.chat_id:
+                        offset += await self._write_chat(f, pending, offset, chats)
+                        pending = []
+                    pending.append(_encode(message))
+                rows += len(batch)
+                if len(batch) < settings.MESSAGE_ARCHIVE_BATCH_SIZE:
+                    break
+                after = (batch[-1].chat_id, batch[-1].id)
+
+            if pending:
+                await self._write_chat(f, pending, offset, chats)
+            await asyncio.to_thread(f.flush)
+            await asyncio.to_thread(os.fsync, f.fileno())
+        except Exception:
+            f.close()
+            partial.unlink(missing_ok=True)
+            raise
+        f.close()
+        await asyncio.to_thread(os.replace, partial, path)
+
+        # the partition is only dropped once the file is complete on disk
+        try:
+            replaced = await self.repository.replace_partition_with_archive(
+                partition, str(path), rows, chats
+            )
+        except Exception:
+            path.unlink(missing_ok=True)
+            raise
+        if not replaced:
+            path.unlink(missing_ok=True)
+        if replaced is None:
+            raise RuntimeError(f"could not replace {name} with its archive")
+        if replaced:
+            logger.info(f"Archived {rows} messages of {len(chats)} chats from {name}")
+        return replaced
+
+    async def read(
+        self, chat_id: int, limit: Optional[int] = None, before_id: Optional[int] = None
+    ) -> List[Message]:
+        chunks = await self.repository.get_archived_chunks(chat_id, before_id)
+        rows: List[Dict] = []
+        for path, offset, length in chunks or []:
+            member = await asyncio.to_thread(_read_member, path, offset, length)
+            rows = [
+                row for row in member if before_id is None or row["id"] < before_id
+            ] + rows
+            if limit is not None and len(rows) >= limit:
+                break
+
+        rows.sort(key=lambda row: row["id"])
+        if limit is not None:
+            rows = rows[-limit:] if limit else []
+        return [_decode(row) for row in rows]
+
+    async def iter_chat(
+        self, chat_id: int, batch_size: int = settings.EXPORT_CHUNK_SIZE
+    ) -> AsyncIterator[List[Message]]:
+        # oldest first, members are streamed rather than read whole
+        chunks = await self.repository.get_archived_chunks(chat_id)
+        for path, offset, length in reversed(chunks or []):
+            batches = _iter_member(path, offset, length, batch_size)
+            try:
+                batch = await asyncio.to_thread(next, batches, None)
+                while batch is not None:
+                    yield [_decode(row) for row in batch]
+                    batch = await asyncio.to_thread(next, batches, None)
+            finally:
+                batches.close()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.maintain()
+            except Exception as e:
+                logger.error(f"Message partition maintenance failed: {e}")
+
+    @staticmethod
+    async def _write_chat(f, rows: List[Dict], offset: int, chats: List[Dict]) -> int:
+        data = await asyncio.to_thread(_compress, rows)
+        await asyncio.to_thread(f.write, data)
+        chats.append(
+            {
+                "chat_id": rows[0]["chat_id"],
+                "offset": offset,
+                "length": len(data),
+                "rows": len(rows),
+                "min_id": rows[0]["id"],
+                "max_id": rows[-1]["id"],
+            }
+        )
+        return len(data)
+
+    @staticmethod
+    def _months(since: datetime) -> List[Partition]:
+        start = month_start(since)
+        end = month_start(datetime.now(timezone.utc))
+        for _ in range(settings.MESSAGE_PARTITIONS_AHEAD):
+            end = next_month(end)
+
+        partitions = []
+        while start <= end:
+            partitions.append(partition_for(start))
+            start = next_month(start)
+        return partitions
@@ -0,0 +1,107 @@
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional
+
+from app.core.config import settings
+from app.domain.models.message import Message
+
+
+class ChatRing:
+    __slots__ = ("messages", "complete", "version")
+
+    def __init__(self, size: int, version: int) -> None:
+        self.messages: Deque[Message] = deque(maxlen=size)
+        # True while the ring holds every message the chat has
+        self.complete = False
+        # chats.version the ring is current for, messages sent through other
+        # workers bump it and the ring stops matching
+        self.version = version
+
+
+class MessageRingBuffer:
+    def __init__(
+        self,
+        per_chat: int = settings.MESSAGE_BUFFER_PER_CHAT,
+        max_messages: int = settings.MESSAGE_BUFFER_MAX_MESSAGES,
+    ) -> None:
+        self.per_chat = per_chat
+        self.max_messages = max_messages
+        self._chats: "OrderedDict[int, ChatRing]" = OrderedDict()
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def get_page(
+        self, chat_id: int, version: int, limit: Optional[int] = None
+    ) -> Optional[List[Message]]:
+        ring = self._chats.get(chat_id)
+        if (
+            ring is None or
+            ring.version != version or
+            not self._covers(ring, limit)
+        ):
+            self.misses += 1
+            return None
+
+        self._chats.move_to_end(chat_id)
+        self.hits += 1
+        messages = list(ring.messages)
+        return messages if limit is None else messages[-limit:]
+
+    def fill(
+        self, chat_id: int, version: int, messages: List[Message], complete: bool
+    ) -> None:
+        # version is read before the messages, a page holding more than the
+        # version says only costs a refill later
+        ring = self._chats.get(chat_id)
+        if ring is not None and ring.version > version:
+            return
+
+        fresh = ChatRing(self.per_chat, version)
+        fresh.messages.extend(messages)
+        fresh.complete = complete and len(messages) <= self.per_chat
+        self._replace(chat_id, fresh)
+
+    def append(self, message: Message, version: int) -> None:
+        # version is what sending the message bumped chats.version to, nothing
+        # else was sent in between only if the ring is one behind
+        ring = self._chats.get(message.chat_id)
+        if ring is None or ring.version != version - 1:
+            ring = ChatRing(self.per_chat, version)
+            self._replace(message.chat_id, ring)
+        else:
+            self._chats.move_to_end(message.chat_id)
+            ring.version = version
+            if ring.messages and ring.messages[-1].id >= message.id:
+                # already read in by a fill racing the send
+                return
+
+        if len(ring.messages) == ring.messages.maxlen:
+            ring.complete = False
+        else:
+            self._total += 1
+        ring.messages.append(message)
+        self._evict_cold()
+
+    def evict(self, chat_id: int) -> None:
+        ring = self._chats.pop(chat_id, None)
+        if ring is not None:
+            self._total -= len(ring.messages)
+
+    def _covers(self, ring: ChatRing, limit: Optional[int]) -> bool:
+        if ring.complete:
+            return True
+        return limit is not None and limit <= len(ring.messages)
+
+    def _replace(self, chat_id: int, ring: ChatRing) -> None:
+        self.evict(chat_id)
+        self._chats[chat_id] = ring
+        self._total += len(ring.messages)
+        self._evict_cold()
+
+    def _evict_cold(self) -> None:
+        while self._total > self.max_messages and len(self._chats) > 1:
+            _, ring = self._chats.popitem(last=False)
+            self._total -= len(ring.messages)
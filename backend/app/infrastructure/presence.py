@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.infrastructure.presence_store import PresenceStore
+
+logger = logging.getLogger(__name__)
+
+EmitCallable = Callable[..., Awaitable[None]]
+
+
+class PresenceHub:
+    def __init__(
+        self,
+        emit: EmitCallable,
+        window: float = settings.PRESENCE_COALESCE_WINDOW,
+        store: Optional[PresenceStore] = None,
+    ) -> None:
+        self._emit = emit
+        self._window = window
+        # with a store, who is online comes from every worker's connections
+        self.store = store
+        if store is not None:
+            store.subscribe(self._mark)
+        # user_id -> sid of the connection that currently represents the user
+        self.online: Dict[str, str] = {}
+        # user_id -> contacts whose presence the user is subscribed to
+        self.subscriptions: Dict[str, Set[str]] = {}
+        # user_id -> online users subscribed to that user's presence
+        self.watchers: Dict[str, Set[str]] = {}
+        self._published: Set[str] = set()
+        self._pending: Dict[str, bool] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def is_online(self, user_id: str) -> bool:
+        return user_id in self.online
+
+    async def connect(self, user_id: str, sid: str, contacts: Iterable[str]) -> None:
+        self.online[user_id] = sid
+        self._subscribe(user_id, contacts)
+        if self.store is None:
+            self._mark(user_id, True)
+        else:
+            await self.store.connect(sid, user_id)
+
+    async def disconnect(self, user_id: Optional[str], sid: str) -> None:
+        if self.store is not None:
+            await self.store.disconnect(sid)
+        if user_id is None or self.online.get(user_id) != sid:
+            return
+
+        del self.online[user_id]
+        for contact in self.subscriptions.pop(user_id, set()):
+            watchers = self.watchers.get(contact)
+            if watchers is not None:
+                watchers.discard(user_id)
+                if not watchers:
+                    del self.watchers[contact]
+        if self.store is None:
+            self._mark(user_id, False)
+
+    def snapshot(self, user_id: str) -> Dict[str, bool]:
+        return {
+            contact: True
+            for contact in self.subscriptions.get(user_id, ())
+            if contact in self._published
+        }
+
+    async def link(self, user_id: str, contact_id: str) -> None:
+        for watcher, target in ((user_id, contact_id), (contact_id, user_id)):
+            if watcher not in self.online:
+                continue
+            if target in self.subscriptions.get(watcher, ()):
+                continue
+
+            self._subscribe(watcher, [target])
+            if target in self._published:
+                await self._emit(
+                    "presence_diff",
+                    {"online": [target], "offline": []},
+                    room=self.online[watcher],
+                )
+
+    def _subscribe(self, user_id: str, contacts: Iterable[str]) -> None:
+        subscriptions = self.subscriptions.setdefault(user_id, set())
+        for contact in contacts:
+            if contact == user_id:
+                continue
+            subscriptions.add(contact)
+            self.watchers.setdefault(contact, set()).add(user_id)
+
+    def _mark(self, user_id: str, online: bool) -> None:
+        self._pending[user_id] = online
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._window)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush presence updates: {e}")
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        diffs: Dict[str, Dict[str, List[str]]] = {}
+
+        for user_id, online in pending.items():
+            # connections that flapped inside the window end where they started
+            if online == (user_id in self._published):
+                continue
+
+            if online:
+                self._published.add(user_id)
+            else:
+                self._published.discard(user_id)
+
+            key = "online" if online else "offline"
+            for watcher in self.watchers.get(user_id, ()):
+                sid = self.online.get(watcher)
+                if sid is None:
+                    continue
+                diff = diffs.setdefault(sid, {"online": [], "offline": []})
+                diff[key].append(user_id)
+
+        for sid, diff in diffs.items():
+            await self._emit("presence_diff", diff, room=sid)
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.database import Database
+from app.infrastructure.repositories.presence_repository import (
+    CHANNEL, PresenceRepository)
+
+logger = logging.getLogger(__name__)
+
+ChangeCallback = Callable[[str, bool], None]
+
+
+class PresenceStore:
+    def __init__(
+        self,
+        repository: PresenceRepository,
+        database: Database,
+        ttl: float = settings.PRESENCE_TTL,
+        heartbeat_interval: float = settings.PRESENCE_HEARTBEAT_INTERVAL,
+        refresh_window: float = settings.PRESENCE_REFRESH_WINDOW,
+    ) -> None:
+        self.repository = repository
+        self.database = database
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.refresh_window = refresh_window
+        self.worker_id = (
+            f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        )
+        # users with a live connection on any worker, kept current by notifications
+        self.online: Set[str] = set()
+        # this worker's connections, sid -> user_id
+        self.local: Dict[str, str] = {}
+        self.refreshes = 0
+        self._listeners: List[ChangeCallback] = []
+        self._dirty: Set[str] = set()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def is_online(self, user_id: str) -> bool:
+        return user_id in self.online
+
+    def subscribe(self, callback: ChangeCallback) -> None:
+        self._listeners.append(callback)
+
+    async def connect(self, sid: str, user_id: str) -> None:
+        self.local[sid] = user_id
+        await self.repository.connect(sid, user_id, self.worker_id, self.ttl)
+
+    async def disconnect(self, sid: str) -> None:
+        if self.local.pop(sid, None) is not None:
+            await self.repository.disconnect([sid])
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._listen()),
+                asyncio.create_task(self._heartbeat()),
+            ]
+
+    async def stop(self) -> None:
+        for task in self._tasks + [self._refresh_task]:
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._tasks, self._refresh_task = [], None
+
+        # the other workers learn about it now instead of after the TTL
+        self.local.clear()
+        try:
+            await self.repository.disconnect_worker(self.worker_id)
+        except Exception as e:
+            logger.error(f"Failed to remove this worker's presence: {e}")
+
+    async def resync(self) -> None:
+        online = await self.repository.online_users()
+        if online is None:
+            raise RuntimeError("could not read presence")
+        self._apply(set(online), self.online)
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        self._dirty.update(payload.split(","))
+        self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_later())
+
+    async def _refresh_later(self) -> None:
+        # notifications that arrive together are answered by one query
+        await asyncio.sleep(self.refresh_window)
+        dirty, self._dirty = self._dirty, set()
+        online = await self.repository.online_among(list(dirty))
+        if online is None:
+            # the query failed, the heartbeat schedules another attempt
+            self._dirty |= dirty
+            return
+        self.refreshes += 1
+        self._apply(set(online), dirty)
+
+    def _apply(self, online: Set[str], checked: Iterable[str]) -> None:
+        changes = {}
+        for user_id in set(checked) | online:
+            now_online = user_id in online
+            if now_online != (user_id in self.online):
+                changes[user_id] = now_online
+
+        for user_id, now_online in changes.items():
+            if now_online:
+                self.online.add(user_id)
+            else:
+                self.online.discard(user_id)
+            for callback in self._listeners:
+                callback(user_id, now_online)
+
+    async def _listen(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                async with self.database.driver_connection() as connection:
+                    lost = asyncio.Event()
+                    connection.add_termination_listener(lambda _: lost.set())
+                    await connection.add_listener(CHANNEL, self._on_notify)
+                    try:
+                        # changes made while nobody was listening
+                        await self.resync()
+                        delay = 1.0
+                        await lost.wait()
+                    finally:
+                        if not connection.is_closed():
+                            await connection.remove_listener(
+                                CHANNEL, self._on_notify
+                            )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(
+                    f"Presence listener failed, retrying in {delay:.0f}s: {e}"
+                )
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.STARTUP_RETRY_MAX_INTERVAL)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.repository.heartbeat(list(self.local), self.ttl)
+                # any worker may clear the rows a crashed worker left behind
+                await self.repository.expire()
+                if self._dirty:
+                    self._schedule_refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh presence heartbeats: {e}")
@@ -0,0 +1,164 @@
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+DEFAULT_EVENT_COSTS: Dict[str, float] = {
+    "set_user_id": 5.0,
+    "chat": 3.0,
+    "get_online_users": 2.0,
+    "message": 1.0,
+    "read": 0.5,
+    "heartbeat": 0.2,
+}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> float:
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+        return self.tokens
+
+    @property
+    def is_full(self) -> bool:
+        return self.refill(time.monotonic()) >= self.capacity
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        sid_rate: float = settings.SOCKET_SID_RATE,
+        sid_burst: float = settings.SOCKET_SID_BURST,
+        user_rate: float = settings.SOCKET_USER_RATE,
+        user_burst: float = settings.SOCKET_USER_BURST,
+        max_violations: int = settings.SOCKET_MAX_VIOLATIONS,
+        violation_decay: float = settings.SOCKET_VIOLATION_DECAY,
+        max_outbound_queue: int = settings.SOCKET_MAX_OUTBOUND_QUEUE,
+        slow_consumer_policy: str = settings.SOCKET_SLOW_CONSUMER_POLICY,
+        event_costs: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.sid_rate = sid_rate
+        self.sid_burst = sid_burst
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_violations = max_violations
+        self.violation_decay = violation_decay
+        self.max_outbound_queue = max_outbound_queue
+        self.slow_consumer_policy = slow_consumer_policy
+        self.event_costs = event_costs or DEFAULT_EVENT_COSTS
+
+        self._sid_buckets: Dict[str, TokenBucket] = {}
+        self._user_buckets: Dict[str, TokenBucket] = {}
+        # sid -> (violations, when last counted), leaking at violation_decay
+        self._violations: Dict[str, Tuple[float, float]] = {}
+        # a drained user bucket is full again after this long
+        self._sweep_interval = max(user_burst / user_rate, 1.0)
+        self._swept_at = time.monotonic()
+
+        self.throttled: Counter = Counter()
+        self.dropped_emits: Counter = Counter()
+        self.disconnects: Counter = Counter()
+
+    def allow(self, sid: str, user_id: Optional[str], event: str) -> bool:
+        cost = self.event_costs.get(event, 1.0)
+        now = time.monotonic()
+        if now - self._swept_at >= self._sweep_interval:
+            self._evict_idle(now)
+
+        buckets = [
+            self._bucket(self._sid_buckets, sid, self.sid_rate, self.sid_burst)
+        ]
+        if user_id:
+            buckets.append(
+                self._bucket(
+                    self._user_buckets, user_id, self.user_rate, self.user_burst
+                )
+            )
+
+        if any(bucket.refill(now) < cost for bucket in buckets):
+            self.throttled[event] += 1
+            self._violations[sid] = (self._violation_score(sid, now) + 1, now)
+            return False
+
+        # allowed events don't clear violations, alternating with them would
+        # otherwise keep a flooding client connected
+        for bucket in buckets:
+            bucket.tokens -= cost
+        return True
+
+    def should_disconnect(self, sid: str) -> bool:
+        if self._violation_score(sid, time.monotonic()) < self.max_violations:
+            return False
+
+        self.disconnects["rate_limit"] += 1
+        return True
+
+    def is_slow_consumer(self, backlog: int) -> bool:
+        return backlog >= self.max_outbound_queue
+
+    def on_slow_consumer(self, event: str) -> bool:
+        if self.slow_consumer_policy == "disconnect":
+            self.disconnects["slow_consumer"] += 1
+            return True
+
+        self.dropped_emits[event] += 1
+        return False
+
+    def forget(self, sid: str, user_id: Optional[str] = None) -> None:
+        self._sid_buckets.pop(sid, None)
+        self._violations.pop(sid, None)
+
+        # a full bucket carries no debt, so dropping it cannot be used to reset limits
+        bucket = self._user_buckets.get(user_id)
+        if bucket is not None and bucket.is_full:
+            del self._user_buckets[user_id]
+
+    def _violation_score(self, sid: str, now: float) -> float:
+        score, counted_at = self._violations.get(sid, (0.0, now))
+        return max(0.0, score - (now - counted_at) * self.violation_decay)
+
+    def _evict_idle(self, now: float) -> None:
+        # full buckets and decayed violations are what a new client starts
+        # with, dropping them changes nothing but the memory held
+        self._swept_at = now
+        for buckets in (self._sid_buckets, self._user_buckets):
+            for key in [
+                key
+                for key, bucket in buckets.items()
+                if bucket.refill(now) >= bucket.capacity
+            ]:
+                del buckets[key]
+        for sid in [
+            sid
+            for sid in self._violations
+            if self._violation_score(sid, now) <= 0
+        ]:
+            del self._violations[sid]
+
+    def stats(self) -> dict:
+        return {
+            "throttled": dict(self.throttled),
+            "dropped_emits": dict(self.dropped_emits),
+            "disconnects": dict(self.disconnects),
+            "tracked_sids": len(self._sid_buckets),
+            "tracked_users": len(self._user_buckets),
+        }
+
+    @staticmethod
+    def _bucket(
+        buckets: Dict[str, TokenBucket], key: str, rate: float, capacity: float
+    ) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, capacity)
+        return bucket
@@ -0,0 +1,295 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from app.core.tracing import traced
+from app.domain.models.association_tables import chat_members
+from app.domain.models.attachment import (Attachment, AttachmentUpload,
+                                          MessageAttachment)
+from app.domain.repositories.base_repository import BaseRepository
+from app.domain.schemas.attachment import AttachmentResponse
+from fastapi import HTTPException
+from sqlalchemy import Integer, any_, bindparam, delete, func, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.future import select
+
+
+@traced
+class AttachmentRepository(BaseRepository):
+    def __init__(self, session_factory):
+        super().__init__(session_factory, Attachment)
+
+    async def get_by_sha256(self, sha256: str) -> Optional[Attachment]:
+        try:
+            async with self.session_factory() as session:
+                return await session.scalar(
+                    select(Attachment).where(Attachment.sha256 == sha256)
+                )
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error reading attachment"
+            ) from e
+
+    async def create_upload(self, upload: AttachmentUpload) -> AttachmentUpload:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    session.add(upload)
+                    await session.flush()
+                    return upload
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error creating upload"
+            ) from e
+
+    async def get_upload(
+        self, upload_id: str, user_id: str
+    ) -> Optional[AttachmentUpload]:
+        try:
+            async with self.session_factory() as session:
+                return await session.scalar(
+                    select(AttachmentUpload).where(
+                        AttachmentUpload.id == upload_id,
+                        AttachmentUpload.user_id == user_id,
+                    )
+                )
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="error reading upload") from e
+
+    async def find_open_upload(
+        self, user_id: str, sha256: str, size: int
+    ) -> Optional[AttachmentUpload]:
+        # lets a client that lost the upload id resume from the same file
+        try:
+            async with self.session_factory() as session:
+                return await session.scalar(
+                    select(AttachmentUpload)
+                    .where(
+                        AttachmentUpload.user_id == user_id,
+                        AttachmentUpload.sha256 == sha256,
+                        AttachmentUpload.size == size,
+                        AttachmentUpload.attachment_id.is_(None),
+                        AttachmentUpload.expires_at > func.now(),
+                    )
+                    .order_by(AttachmentUpload.offset.desc())
+                    .limit(1)
+                )
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="error reading upload") from e
+
+    async def advance_upload(
+        self, upload_id: str, offset: int, new_offset: int, expires_at: datetime
+    ) -> bool:
+        # only moves forward from the offset the chunk was written at, a
+        # concurrent request for the same range loses here
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.execute(
+                        update(AttachmentUpload)
+                        .where(
+                            AttachmentUpload.id == upload_id,
+                            AttachmentUpload.offset == offset,
+                        )
+                        .values(offset=new_offset, expires_at=expires_at)
+                        .execution_options(synchronize_session=False)
+                    )
+                    return result.rowcount == 1
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error updating upload"
+            ) from e
+
+    async def reset_upload(self, upload_id: str) -> None:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    await session.execute(
+                        update(AttachmentUpload)
+                        .where(AttachmentUpload.id == upload_id)
+                        .values(offset=0)
+                        .execution_options(synchronize_session=False)
+                    )
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error updating upload"
+            ) from e
+
+    async def complete_upload(self, upload: AttachmentUpload) -> Attachment:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    # the same content finished by someone else meanwhile is reused
+                    await session.execute(
+                        insert(Attachment)
+                        .values(
+                            sha256=upload.sha256,
+                            size=upload.size,
+                            created_at=func.now(),
+                        )
+                        .on_conflict_do_nothing(index_elements=[Attachment.sha256])
+                    )
+                    attachment = await session.scalar(
+                        select(Attachment).where(Attachment.sha256 == upload.sha256)
+                    )
+                    await session.execute(
+                        update(AttachmentUpload)
+                        .where(AttachmentUpload.id == upload.id)
+                        .values(attachment_id=attachment.id, offset=upload.size)
+                        .execution_options(synchronize_session=False)
+                    )
+                    return attachment
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error completing upload"
+            ) from e
+
+    async def delete_expired_uploads(self) -> List[str]:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.scalars(
+                        delete(AttachmentUpload)
+                        .where(
+                            AttachmentUpload.attachment_id.is_(None),
+                            AttachmentUpload.expires_at < func.now(),
+                        )
+                        .returning(AttachmentUpload.id)
+                        .execution_options(synchronize_session=False)
+                    )
+                    return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error removing uploads"
+            ) from e
+
+    async def get_owned(
+        self, user_id: str, attachment_ids: Sequence[int]
+    ) -> List[Tuple[Attachment, AttachmentUpload]]:
+        # attachments the user uploaded, or was handed by the dedup check, with
+        # their latest upload of each for the name
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(Attachment, AttachmentUpload)
+                    .join(
+                        AttachmentUpload,
+                        AttachmentUpload.attachment_id == Attachment.id,
+                    )
+                    .where(
+                        AttachmentUpload.user_id == user_id,
+                        Attachment.id == any_(self._ints("ids", attachment_ids)),
+                    )
+                    .distinct(Attachment.id)
+                    .order_by(Attachment.id, AttachmentUpload.expires_at.desc())
+                )
+                return [tuple(row) for row in result.all()]
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error reading attachments"
+            ) from e
+
+    async def attach(
+        self,
+        message_id: int,
+        chat_id: int,
+        attachments: Sequence[AttachmentResponse],
+    ) -> None:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    await session.execute(
+                        insert(MessageAttachment),
+                        [
+                            {
+                                "message_id": message_id,
+                                "attachment_id": attachment.id,
+                                "chat_id": chat_id,
+                                "content_type": attachment.content_type,
+                                "filename": attachment.filename,
+                            }
+                            for attachment in attachments
+                        ],
+                    )
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error attaching files"
+            ) from e
+
+    async def get_for_messages(
+        self, message_ids: Sequence[int]
+    ) -> Dict[int, List[Tuple[Attachment, MessageAttachment]]]:
+        if not message_ids:
+            return {}
+
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(MessageAttachment, Attachment)
+                    .join(Attachment, Attachment.id == MessageAttachment.attachment_id)
+                    .where(
+                        MessageAttachment.message_id ==
+                        any_(self._ints("ids", message_ids))
+                    )
+                    .order_by(MessageAttachment.message_id, Attachment.id)
+                )
+                attachments: Dict[int, List[Tuple[Attachment, MessageAttachment]]] = {}
+                for link, attachment in result.all():
+                    attachments.setdefault(link.message_id, []).append(
+                        (attachment, link)
+                    )
+                return attachments
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error reading attachments"
+            ) from e
+
+    async def get_readable(
+        self, user_id: str, attachment_id: int
+    ) -> Optional[Tuple[Attachment, Union[AttachmentUpload, MessageAttachment]]]:
+        # for uploaders, and members of a chat the file was sent to, with the
+        # name they know it by; None for anyone else
+        try:
+            async with self.session_factory() as session:
+                uploaded = await session.execute(
+                    select(Attachment, AttachmentUpload)
+                    .join(
+                        AttachmentUpload,
+                        AttachmentUpload.attachment_id == Attachment.id,
+                    )
+                    .where(
+                        Attachment.id == attachment_id,
+                        AttachmentUpload.user_id == user_id,
+                    )
+                    .order_by(AttachmentUpload.expires_at.desc())
+                    .limit(1)
+                )
+                row = uploaded.first()
+                if row is None:
+                    shared = await session.execute(
+                        select(Attachment, MessageAttachment)
+                        .join(
+                            MessageAttachment,
+                            MessageAttachment.attachment_id == Attachment.id,
+                        )
+                        .join(
+                            chat_members,
+                            chat_members.c.chat_id == MessageAttachment.chat_id,
+                        )
+                        .where(
+                            Attachment.id == attachment_id,
+                            chat_members.c.supertokens_id == user_id,
+                        )
+                        .order_by(MessageAttachment.message_id.desc())
+                        .limit(1)
+                    )
+                    row = shared.first()
+                return tuple(row) if row is not None else None
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error reading attachment"
+            ) from e
+
+    @staticmethod
+    def _ints(name: str, values: Sequence[int]):
+        return bindparam(name, list(values), type_=ARRAY(Integer))
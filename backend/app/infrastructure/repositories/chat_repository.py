@@ -1,16 +1,23 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from app.core.tracing import traced
+from app.domain.models.association_tables import chat_members
 from app.domain.models.chat import Chat
+from app.domain.models.message import Message
 from app.domain.models.user import User
 from app.domain.repositories.base_repository import (BaseRepository,
-                                                     CreateSchemaType)
+                                                     CreateSchemaType,
+                                                     UpdateSchemaType)
 from fastapi import HTTPException
-from sqlalchemy import and_, func
+from sqlalchemy import (Integer, String, and_, cast, column, delete, func,
+                        literal, update, values)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 
+@traced
 class ChatRepository(BaseRepository):
     def __init__(self, session_factory):
         super().__init__(session_factory, Chat)
@@ -56,7 +63,7 @@ class ChatRepository(BaseRepository):
                 chat = Chat(members=users_list)
 
                 session.add(chat)
-                await session.commit()
+                await session.flush()
 
                 await session.refresh(chat, ["members", "messages"])
 
@@ -67,19 +74,232 @@ class ChatRepository(BaseRepository):
                 status_code=500, detail="Failed to create chat. Please try again later."
             ) from e
 
+    async def delete(self, id: int) -> bool:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.execute(
+                        delete(Chat).where(Chat.id == id).returning(Chat.id)
+                    )
+                    return result.scalar_one_or_none() is not None
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail=f"error object deletion with id {id}"
+            ) from e
+
+    async def update_many(
+        self, ids: Sequence[int], schema: UpdateSchemaType
+    ) -> List[Chat]:
+        # the version moves in the same statement, cached pages and ETags of
+        # the chats stop matching
+        update_data = schema.model_dump(exclude_unset=True)
+        if not ids or not update_data:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.scalars(
+                        update(Chat)
+                        .where(Chat.id.in_(ids))
+                        .values(**update_data, version=Chat.version + 1)
+                        .returning(Chat)
+                        .execution_options(synchronize_session=False)
+                    )
+                    return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk update error") from e
+
+    async def get_version(self, id: int) -> Optional[int]:
+        try:
+            async with self.session_factory() as session:
+                return await session.scalar(select(Chat.version).where(Chat.id == id))
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail=f"error to get version of chat {id}"
+            ) from e
+
+    async def is_member(self, id: int, user_id: str) -> bool:
+        try:
+            async with self.session_factory() as session:
+                member = await session.scalar(
+                    select(chat_members.c.chat_id).where(
+                        chat_members.c.chat_id == id,
+                        chat_members.c.supertokens_id == user_id,
+                    )
+                )
+                return member is not None
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail=f"error to check members of chat {id}"
+            ) from e
+
+    async def get_user_chats_state(self, user_id: str) -> Optional[str]:
+        # md5 of the user's chats (id, version) and of every member's
+        # (supertokens_id, last_seen_at), everything the chat list shows
+        # changes one of them
+        try:
+            async with self.session_factory() as session:
+                user_chats = select(chat_members.c.chat_id).where(
+                    chat_members.c.supertokens_id == user_id
+                )
+                chats = select(
+                    func.string_agg(
+                        cast(Chat.id, String) + ":" + cast(Chat.version, String),
+                        aggregate_order_by(literal(","), Chat.id),
+                    )
+                ).where(Chat.id.in_(user_chats))
+                members = select(
+                    func.string_agg(
+                        User.supertokens_id +
+                        ":" +
+                        func.coalesce(cast(User.last_seen_at, String), ""),
+                        aggregate_order_by(literal(","), User.supertokens_id),
+                    )
+                ).where(
+                    User.supertokens_id.in_(
+                        select(chat_members.c.supertokens_id).where(
+                            chat_members.c.chat_id.in_(user_chats)
+                        )
+                    )
+                )
+                return await session.scalar(
+                    select(
+                        func.md5(
+                            func.coalesce(chats.scalar_subquery(), "") +
+                            "|" +
+                            func.coalesce(members.scalar_subquery(), "")
+                        )
+                    )
+                )
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail=f"error to get chats version of {user_id}"
+            ) from e
+
     async def get_user_chats(self, user_id: str) -> List[Chat]:
         try:
             async with self.session_factory() as session:
+                user_chats = select(chat_members.c.chat_id).where(
+                    chat_members.c.supertokens_id == user_id
+                )
                 stmt = (
                     select(Chat)
-                    .options(joinedload(Chat.members), joinedload(Chat.messages))
-                    .join(Chat.members)
-                    .filter(Chat.members.any(User.supertokens_id == user_id))
+                    .options(selectinload(Chat.messages))
+                    .where(Chat.id.in_(user_chats))
                 )
                 result = await session.execute(stmt)
-                return result.unique().scalars().all()
+                return result.scalars().all()
         except SQLAlchemyError as e:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to get user chat. Please try again later.",
             ) from e
+
+    async def get_member_ids(self, chat_ids: List[int]) -> Dict[int, List[str]]:
+        if not chat_ids:
+            return {}
+
+        try:
+            async with self.session_factory() as session:
+                stmt = select(
+                    chat_members.c.chat_id, chat_members.c.supertokens_id
+                ).where(chat_members.c.chat_id.in_(chat_ids))
+                result = await session.execute(stmt)
+
+                member_ids: Dict[int, List[str]] = {}
+                for chat_id, supertokens_id in result.all():
+                    member_ids.setdefault(chat_id, []).append(supertokens_id)
+                return member_ids
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to get chat members. Please try again later.",
+            ) from e
+
+    async def get_chat_partner_ids(self, user_id: str) -> List[str]:
+        try:
+            async with self.session_factory() as session:
+                user_chats = select(chat_members.c.chat_id).where(
+                    chat_members.c.supertokens_id == user_id
+                )
+                stmt = (
+                    select(chat_members.c.supertokens_id)
+                    .where(
+                        chat_members.c.chat_id.in_(user_chats),
+                        chat_members.c.supertokens_id != user_id,
+                    )
+                    .distinct()
+                )
+                result = await session.execute(stmt)
+                return result.scalars().all()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to get chat partners. Please try again later.",
+            ) from e
+
+    async def bulk_update_last_read(
+        self, last_read: Dict[Tuple[int, str], int]
+    ) -> None:
+        if not last_read:
+            return
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    reads = values(
+                        column("chat_id", Integer),
+                        column("supertokens_id", String),
+                        column("message_id", Integer),
+                        name="reads",
+                    ).data(
+                        [
+                            (chat_id, user_id, message_id)
+                            for (chat_id, user_id), message_id in last_read.items()
+                        ]
+                    )
+                    stmt = (
+                        update(chat_members)
+                        .where(
+                            chat_members.c.chat_id == reads.c.chat_id,
+                            chat_members.c.supertokens_id == reads.c.supertokens_id,
+                        )
+                        .values(
+                            last_read_message_id=func.greatest(
+                                func.coalesce(chat_members.c.last_read_message_id, 0),
+                                reads.c.message_id,
+                            )
+                        )
+                    )
+                    await session.execute(stmt)
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to update read receipts. Please try again later.",
+            ) from e
+
+    async def get_unread_counts(self, user_id: str) -> Dict[int, int]:
+        try:
+            async with self.session_factory() as session:
+                stmt = (
+                    select(chat_members.c.chat_id, func.count(Message.id))
+                    .join(
+                        Message,
+                        and_(
+                            Message.chat_id == chat_members.c.chat_id,
+                            Message.id >
+                            func.coalesce(chat_members.c.last_read_message_id, 0),
+                            Message.sender_id != user_id,
+                        ),
+                    )
+                    .where(chat_members.c.supertokens_id == user_id)
+                    .group_by(chat_members.c.chat_id)
+                )
+                result = await session.execute(stmt)
+                return {chat_id: count for chat_id, count in result.all()}
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to get unread counts. Please try again later.",
+            ) from e
@@ -1,24 +1,358 @@
-from typing import List
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
+from app.core.config import settings
+from app.core.tracing import traced
+from app.domain.models.chat import Chat
 from app.domain.models.message import Message
-from app.domain.repositories.base_repository import BaseRepository
+from app.domain.models.message_archive import (MessageArchive,
+                                               MessageArchiveChat)
+from app.domain.repositories.base_repository import (BaseRepository,
+                                                     CreateSchemaType,
+                                                     UpdateSchemaType)
+from app.infrastructure.repositories.versions import bump_chat, bump_chats
 from fastapi import HTTPException
+from sqlalchemy import (delete, func, insert, literal_column, text, tuple_,
+                        update)
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.future import select
 
+# (name, start, end) of one monthly partition
+Partition = Tuple[str, datetime, datetime]
 
+INFINITY = "'infinity'::timestamptz"
+
+
+@traced
 class MessageRepository(BaseRepository):
     def __init__(self, session_factory):
         super().__init__(session_factory, Message)
 
-    async def get_chat_messages(self, chat_id: int) -> List[Message]:
+    async def create(self, schema: CreateSchemaType) -> Message:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    message = Message(**schema.model_dump())
+                    session.add(message)
+                    await session.flush()
+                    # the version the message makes current, for the ring buffer
+                    message.chat_version = await session.scalar(
+                        bump_chat(message.chat_id).returning(Chat.version)
+                    )
+                    return message
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="creation error") from e
+
+    async def create_many(self, schemas: Sequence[CreateSchemaType]) -> List[Message]:
+        if not schemas:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.scalars(
+                        insert(Message).returning(Message),
+                        [schema.model_dump() for schema in schemas],
+                    )
+                    messages = result.all()
+                    versions = dict(
+                        (
+                            await session.execute(
+                                bump_chats({m.chat_id for m in messages}).returning(
+                                    Chat.id, Chat.version
+                                )
+                            )
+                        ).all()
+                    )
+                    for message in messages:
+                        message.chat_version = versions[message.chat_id]
+                    return messages
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk creation error") from e
+
+    async def update_many(
+        self, ids: Sequence[int], schema: UpdateSchemaType
+    ) -> List[Message]:
+        update_data = schema.model_dump(exclude_unset=True)
+        if not ids or not update_data:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    # a message moved to another chat changes both chats
+                    chat_ids = set(
+                        await session.scalars(
+                            select(Message.chat_id).where(Message.id.in_(ids))
+                        )
+                    )
+                    result = await session.scalars(
+                        update(Message)
+                        .where(Message.id.in_(ids))
+                        .values(**update_data)
+                        .returning(Message)
+                        .execution_options(synchronize_session=False)
+                    )
+                    messages = result.all()
+                    chat_ids.update(m.chat_id for m in messages)
+                    if chat_ids:
+                        await session.execute(bump_chats(chat_ids))
+                    return messages
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk update error") from e
+
+    async def delete_many(self, ids: Sequence[int]) -> List[int]:
+        if not ids:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.execute(
+                        delete(Message)
+                        .where(Message.id.in_(ids))
+                        .returning(Message.id, Message.chat_id)
+                        .execution_options(synchronize_session=False)
+                    )
+                    rows = result.all()
+                    if rows:
+                        await session.execute(
+                            bump_chats({chat_id for _, chat_id in rows})
+                        )
+                    return [id for id, _ in rows]
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk deletion error") from e
+
+    async def get_chat_messages(
+        self,
+        chat_id: int,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Message]:
         try:
             async with self.session_factory() as session:
                 stmt = select(Message).where(Message.chat_id == chat_id)
-                result = await session.execute(stmt)
-                return result.scalars().all()
+                if before_id is not None:
+                    # bounding created_at lets the planner skip newer partitions,
+                    # the skew covers ids and timestamps taken in a different order
+                    before = (
+                        select(Message.created_at)
+                        .where(Message.id == before_id)
+                        .scalar_subquery()
+                    )
+                    bound = func.coalesce(before, literal_column(INFINITY))
+                    stmt = stmt.where(
+                        Message.id < before_id,
+                        Message.created_at <=
+                        bound + timedelta(seconds=settings.MESSAGE_CLOCK_SKEW),
+                    )
+                if limit is None:
+                    result = await session.execute(stmt.order_by(Message.id))
+                    return result.scalars().all()
+
+                stmt = stmt.order_by(Message.id.desc()).limit(limit)
+                if before_id is not None:
+                    result = await session.execute(stmt)
+                    return list(reversed(result.scalars().all()))
+
+                # the newest page of an active chat is in the latest partition,
+                # older ones are only read for chats that have been quiet
+                recent_since = func.now() - timedelta(
+                    days=settings.MESSAGE_RECENT_WINDOW_DAYS
+                )
+                result = await session.execute(
+                    stmt.where(Message.created_at >= recent_since)
+                )
+                messages = result.scalars().all()
+                if len(messages) < limit:
+                    result = await session.execute(
+                        stmt.where(Message.created_at < recent_since).limit(
+                            limit - len(messages)
+                        )
+                    )
+                    messages += result.scalars().all()
+                return list(reversed(messages))
         except SQLAlchemyError as e:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to get chat messages. Please try again later.",
             ) from e
+
+    async def stream_chat_messages(
+        self, chat_id: int, chunk_size: int
+    ) -> AsyncIterator[List[Message]]:
+        # a server-side cursor, only one chunk of rows is in memory at a time
+        completed = False
+        async with self.session_factory() as session:
+            result = await session.stream_scalars(
+                select(Message)
+                .where(Message.chat_id == chat_id)
+                .order_by(Message.id)
+                .execution_options(yield_per=chunk_size)
+            )
+            async for chunk in result.partitions():
+                yield chunk
+            completed = True
+
+        # the session swallows the error, a silently truncated export is worse
+        if not completed:
+            raise HTTPException(
+                status_code=500, detail="Failed to export chat messages"
+            )
+
+    async def table_kind(self) -> Optional[str]:
+        # "p" once partitioned, "r" for a table from before migration 0006
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    text(
+                        "SELECT relkind FROM pg_class "
+                        "WHERE oid = to_regclass(:table)"
+                    ),
+                    {"table": Message.__tablename__},
+                )
+                kind = result.scalar()
+                return kind.decode() if isinstance(kind, bytes) else kind
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error reading messages table"
+            ) from e
+
+    async def list_partitions(self) -> List[str]:
+        try:
+            async with self.session_factory() as session:
+                result = await session.scalars(
+                    text(
+                        "SELECT c.relname FROM pg_inherits i "
+                        "JOIN pg_class c ON c.oid = i.inhrelid "
+                        "WHERE i.inhparent = to_regclass('messages') "
+                        "ORDER BY c.relname"
+                    )
+                )
+                return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error listing partitions"
+            ) from e
+
+    async def create_partitions(self, partitions: Sequence[Partition]) -> bool:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    for partition in partitions:
+                        await session.execute(_create_partition(*partition))
+                    return True
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error creating partitions"
+            ) from e
+
+    async def get_range_batch(
+        self,
+        start: datetime,
+        end: datetime,
+        after: Tuple[int, int],
+        limit: int,
+    ) -> List[Message]:
+        # keyset pages of one partition in (chat_id, id) order
+        try:
+            async with self.session_factory() as session:
+                result = await session.scalars(
+                    select(Message)
+                    .where(
+                        Message.created_at >= start,
+                        Message.created_at < end,
+                        tuple_(Message.chat_id, Message.id) > after,
+                    )
+                    .order_by(Message.chat_id, Message.id)
+                    .limit(limit)
+                )
+                return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error reading partition"
+            ) from e
+
+    async def replace_partition_with_archive(
+        self, partition: Partition, path: str, rows: int, chats: List[Dict]
+    ) -> bool:
+        name, start, end = partition
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    # the caller holds the partition's advisory lock, detaching
+                    # two partitions at once would deadlock on the parent
+                    await session.execute(
+                        select(func.pg_advisory_xact_lock(func.hashtext("messages")))
+                    )
+                    exists = await session.scalar(
+                        select(func.to_regclass(name).isnot(None))
+                    )
+                    if not exists:
+                        return False
+
+                    count = await session.scalar(text(f"SELECT count(*) FROM {name}"))
+                    if count != rows:
+                        raise ValueError(
+                            f"{name} has {count} rows, the archive holds {rows}"
+                        )
+
+                    archive = MessageArchive(
+                        partition=name,
+                        range_start=start,
+                        range_end=end,
+                        path=path,
+                        rows=rows,
+                    )
+                    session.add(archive)
+                    await session.flush()
+                    if chats:
+                        await session.execute(
+                            insert(MessageArchiveChat),
+                            [{"archive_id": archive.id, **chat} for chat in chats],
+                        )
+                    await session.execute(
+                        text(f"ALTER TABLE messages DETACH PARTITION {name}")
+                    )
+                    await session.execute(text(f"DROP TABLE {name}"))
+                    return True
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error archiving partition"
+            ) from e
+
+    async def get_archived_chunks(
+        self, chat_id: int, before_id: Optional[int] = None
+    ) -> List[Tuple[str, int, int]]:
+        # (path, offset, length) of the chat's gzip members, newest first
+        try:
+            async with self.session_factory() as session:
+                stmt = (
+                    select(
+                        MessageArchive.path,
+                        MessageArchiveChat.offset,
+                        MessageArchiveChat.length,
+                    )
+                    .join(
+                        MessageArchive,
+                        MessageArchive.id == MessageArchiveChat.archive_id,
+                    )
+                    .where(MessageArchiveChat.chat_id == chat_id)
+                    .order_by(MessageArchiveChat.max_id.desc())
+                )
+                if before_id is not None:
+                    stmt = stmt.where(MessageArchiveChat.min_id < before_id)
+                result = await session.execute(stmt)
+                return [tuple(row) for row in result.all()]
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error reading archives"
+            ) from e
+
+
+def _create_partition(name: str, start: datetime, end: datetime):
+    # partition bounds can't be bind parameters, names and dates are generated
+    return text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF messages "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
@@ -0,0 +1,143 @@
+from datetime import timedelta
+from typing import List, Sequence
+
+from app.core.tracing import traced
+from app.domain.models.presence import PresenceConnection
+from app.domain.repositories.base_repository import BaseRepository
+from fastapi import HTTPException
+from sqlalchemy import String, any_, bindparam, delete, func, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.future import select
+
+CHANNEL = "presence"
+NOTIFY_CHUNK = 100
+
+
+@traced
+class PresenceRepository(BaseRepository):
+    def __init__(self, session_factory):
+        super().__init__(session_factory, PresenceConnection)
+
+    async def connect(
+        self, sid: str, user_id: str, worker_id: str, ttl: float
+    ) -> None:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    stmt = insert(self.model).values(
+                        sid=sid,
+                        user_id=user_id,
+                        worker_id=worker_id,
+                        expires_at=func.now() + timedelta(seconds=ttl),
+                    )
+                    await session.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=[self.model.sid],
+                            set_={
+                                "user_id": stmt.excluded.user_id,
+                                "worker_id": stmt.excluded.worker_id,
+                                "expires_at": stmt.excluded.expires_at,
+                            },
+                        )
+                    )
+                    await self._notify(session, [user_id])
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error registering connection"
+            ) from e
+
+    async def disconnect(self, sids: Sequence[str]) -> List[str]:
+        if not sids:
+            return []
+
+        return await self._delete(
+            self.model.sid == any_(self._strings("sids", sids))
+        )
+
+    async def disconnect_worker(self, worker_id: str) -> List[str]:
+        return await self._delete(self.model.worker_id == worker_id)
+
+    async def expire(self) -> List[str]:
+        return await self._delete(self.model.expires_at < func.now())
+
+    async def heartbeat(self, sids: Sequence[str], ttl: float) -> int:
+        if not sids:
+            return 0
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.execute(
+                        update(self.model)
+                        .where(self.model.sid == any_(self._strings("sids", sids)))
+                        .values(expires_at=func.now() + timedelta(seconds=ttl))
+                        .execution_options(synchronize_session=False)
+                    )
+                    return result.rowcount
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="heartbeat error") from e
+
+    async def online_among(self, user_ids: Sequence[str]) -> List[str]:
+        if not user_ids:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                result = await session.scalars(
+                    select(self.model.user_id)
+                    .where(
+                        self.model.user_id == any_(self._strings("ids", user_ids)),
+                        self.model.expires_at > func.now(),
+                    )
+                    .distinct()
+                )
+                return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error reading presence"
+            ) from e
+
+    async def online_users(self) -> List[str]:
+        try:
+            async with self.session_factory() as session:
+                result = await session.scalars(
+                    select(self.model.user_id)
+                    .where(self.model.expires_at > func.now())
+                    .distinct()
+                )
+                return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error reading presence"
+            ) from e
+
+    async def _delete(self, condition) -> List[str]:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.scalars(
+                        delete(self.model)
+                        .where(condition)
+                        .returning(self.model.user_id)
+                        .execution_options(synchronize_session=False)
+                    )
+                    user_ids = sorted(set(result.all()))
+                    await self._notify(session, user_ids)
+                    return user_ids
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error removing connections"
+            ) from e
+
+    @staticmethod
+    async def _notify(session, user_ids: Sequence[str]) -> None:
+        # delivered on commit, listeners re-read the users named in the payload;
+        # chunked to stay well below the 8000 byte payload limit
+        for start in range(0, len(user_ids), NOTIFY_CHUNK):
+            chunk = ",".join(user_ids[start:start + NOTIFY_CHUNK])
+            await session.execute(select(func.pg_notify(CHANNEL, chunk)))
+
+    @staticmethod
+    def _strings(name: str, values: Sequence[str]):
+        return bindparam(name, list(values), type_=ARRAY(String))
@@ -1,11 +1,22 @@
+import re
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.core.tracing import traced
 from app.domain.models.user import User
 from app.domain.repositories.base_repository import (BaseRepository,
                                                      UpdateSchemaType)
+from app.infrastructure.repositories.versions import bump_user_chats
 from fastapi import HTTPException
+from sqlalchemy import (DateTime, String, any_, bindparam, column, delete,
+                        func, or_, text, update, values)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.future import select
 
 
+@traced
 class UserRepository(BaseRepository):
     def __init__(self, session_factory):
         super().__init__(session_factory, User)
@@ -21,10 +32,152 @@ class UserRepository(BaseRepository):
                 status_code=500, detail=f"error to get object with id {id}"
             ) from e
 
+    async def get_many_by_supertokens_ids(self, ids: Sequence[str]) -> List[User]:
+        if not ids:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                stmt = select(self.model).where(
+                    self.model.supertokens_id ==
+                    any_(bindparam("ids", list(ids), type_=ARRAY(String)))
+                )
+                result = await session.execute(stmt)
+                return result.scalars().all()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error to get objects by supertokens ids"
+            ) from e
+
+    async def create_username_search_index(self) -> None:
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    await session.execute(
+                        text("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                    )
+                    await session.execute(
+                        text(
+                            "CREATE INDEX IF NOT EXISTS ix_users_username_trgm "
+                            "ON users USING gin (username gin_trgm_ops)"
+                        )
+                    )
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error creating username search index"
+            ) from e
+
+    async def search_by_username(
+        self,
+        query: str,
+        limit: int,
+        threshold: float = settings.SEARCH_TRGM_THRESHOLD,
+    ) -> List[User]:
+        pattern = re.sub(r"([\\%_])", r"\\\1", query) + "%"
+        prefix = self.model.username.ilike(pattern)
+        # username %> query is word_similarity(query, username) above the
+        # threshold, both it and the prefix match are served by the trigram index
+        similar = self.model.username.op("%>")(query)
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    await session.execute(
+                        select(
+                            func.set_config(
+                                "pg_trgm.word_similarity_threshold",
+                                str(threshold),
+                                True,
+                            )
+                        )
+                    )
+                    stmt = (
+                        select(self.model)
+                        .where(or_(prefix, similar))
+                        .order_by(
+                            prefix.desc(),
+                            func.word_similarity(query, self.model.username).desc(),
+                            self.model.username,
+                        )
+                        .limit(limit)
+                    )
+                    result = await session.execute(stmt)
+                    return result.scalars().all()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error searching users"
+            ) from e
+
+    async def insert_ignoring_conflicts(self, rows: List[Dict]) -> List[User]:
+        if not rows:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.scalars(
+                        insert(self.model)
+                        .on_conflict_do_nothing()
+                        .returning(self.model),
+                        rows,
+                    )
+                    return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk import error") from e
+
+    async def iter_batches(self, batch_size: int) -> AsyncIterator[List[User]]:
+        completed = False
+        async with self.session_factory() as session:
+            # server-side cursor, only one batch is held in memory at a time
+            result = await session.stream_scalars(
+                select(self.model)
+                .order_by(self.model.id)
+                .execution_options(yield_per=batch_size)
+            )
+            async for batch in result.partitions():
+                yield batch
+            completed = True
+
+        # the session swallows errors, a truncated stream must not look complete
+        if not completed:
+            raise HTTPException(status_code=500, detail="error streaming users")
+
+    async def get_index_bound(self, after: int, batch_size: int) -> Optional[int]:
+        # id of the last user in the next batch, None once fewer are left
+        try:
+            async with self.session_factory() as session:
+                return await session.scalar(
+                    select(self.model.id)
+                    .where(self.model.id > after)
+                    .order_by(self.model.id)
+                    .offset(batch_size - 1)
+                    .limit(1)
+                )
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="error reading users") from e
+
+    async def get_index_state(
+        self, after: int, upto: Optional[int]
+    ) -> Dict[str, Optional[datetime]]:
+        try:
+            async with self.session_factory() as session:
+                stmt = select(self.model.supertokens_id, self.model.updated_at).where(
+                    self.model.id > after
+                )
+                if upto is not None:
+                    stmt = stmt.where(self.model.id <= upto)
+                result = await session.execute(stmt)
+                return {
+                    supertokens_id: updated_at
+                    for supertokens_id, updated_at in result.all()
+                }
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="error reading users") from e
+
     async def update_by_supertokens_id(self, id: str, schema: UpdateSchemaType):
         try:
             async with self.session_factory() as session:
-                async with session.begin():
+                async with self.transaction(session):
                     stmt = (
                         select(self.model)
                         .where(self.model.supertokens_id == id)
@@ -43,10 +196,98 @@ class UserRepository(BaseRepository):
                     )
                     for field, value in update_data.items():
                         setattr(obj, field, value)
+                    if update_data:
+                        obj.updated_at = datetime.now()
 
                     await session.flush()
+                    await session.execute(bump_user_chats(id))
                     return obj
         except SQLAlchemyError as e:
             raise HTTPException(
                 status_code=500, detail=f"error updating object with id {id}"
             ) from e
+
+    async def update_many(
+        self, ids: Sequence[int], schema: UpdateSchemaType
+    ) -> List[User]:
+        update_data = schema.model_dump(exclude_unset=True, exclude_none=True)
+        if not ids or not update_data:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    result = await session.scalars(
+                        update(self.model)
+                        .where(self.model.id.in_(ids))
+                        .values(**update_data, updated_at=datetime.now())
+                        .returning(self.model)
+                        .execution_options(synchronize_session=False)
+                    )
+                    users = result.all()
+                    if users:
+                        await session.execute(
+                            bump_user_chats(*(u.supertokens_id for u in users))
+                        )
+                    return users
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk update error") from e
+
+    async def delete_many(self, ids: Sequence[int]) -> List[int]:
+        if not ids:
+            return []
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    # the memberships go with the users, bump their chats first
+                    supertokens_ids = (
+                        await session.scalars(
+                            select(self.model.supertokens_id).where(
+                                self.model.id.in_(ids)
+                            )
+                        )
+                    ).all()
+                    if not supertokens_ids:
+                        return []
+                    await session.execute(bump_user_chats(*supertokens_ids))
+                    result = await session.scalars(
+                        delete(self.model)
+                        .where(self.model.id.in_(ids))
+                        .returning(self.model.id)
+                        .execution_options(synchronize_session=False)
+                    )
+                    return result.all()
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=500, detail="bulk deletion error") from e
+
+    async def bulk_update_last_seen(self, last_seen: Dict[str, datetime]) -> None:
+        if not last_seen:
+            return
+
+        try:
+            async with self.session_factory() as session:
+                async with self.transaction(session):
+                    seen = values(
+                        column("supertokens_id", String),
+                        column("last_seen_at", DateTime(timezone=True)),
+                        name="seen",
+                    ).data(list(last_seen.items()))
+                    stmt = (
+                        update(self.model)
+                        .where(self.model.supertokens_id == seen.c.supertokens_id)
+                        .values(
+                            last_seen_at=func.greatest(
+                                func.coalesce(
+                                    self.model.last_seen_at, seen.c.last_seen_at
+                                ),
+                                seen.c.last_seen_at,
+                            )
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    await session.execute(stmt)
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=500, detail="error updating last seen timestamps"
+            ) from e
@@ -0,0 +1,31 @@
+from app.domain.models.association_tables import chat_members
+from app.domain.models.chat import Chat
+from sqlalchemy import update
+from sqlalchemy.future import select
+
+
+def bump_chat(chat_id: int):
+    return (
+        update(Chat)
+        .where(Chat.id == chat_id)
+        .values(version=Chat.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_chats(chat_ids):
+    # chat_ids is a collection or a select of them
+    return (
+        update(Chat)
+        .where(Chat.id.in_(chat_ids))
+        .values(version=Chat.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_user_chats(*user_ids: str):
+    # a profile change shows up in every chat the user is a member of
+    user_chats = select(chat_members.c.chat_id).where(
+        chat_members.c.supertokens_id.in_(user_ids)
+    )
+    return bump_chats(user_chats)
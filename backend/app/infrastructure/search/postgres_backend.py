@@ -0,0 +1,26 @@
+from typing import Dict, List, Optional
+
+from app.domain.models.user import User
+from app.domain.services.search_backend import SearchBackend
+from app.infrastructure.repositories.user_repository import UserRepository
+from app.infrastructure.user_index import to_document
+
+
+class PostgresSearchBackend(SearchBackend):
+    def __init__(self, repository: UserRepository) -> None:
+        self.repository = repository
+
+    async def prepare(self) -> None:
+        await self.repository.create_username_search_index()
+
+    async def search(self, query: str, limit: int = 10) -> List[Dict]:
+        users = await self.repository.search_by_username(query, limit) or []
+        return [to_document(user) for user in users]
+
+    async def index(self, users: List[User]) -> List[Optional[str]]:
+        # the trigram index is maintained by Postgres with the rows themselves
+        return [None] * len(users)
+
+    async def remove(self, ids: List[int]) -> None:
+        # the deleted rows leave the trigram index with them
+        pass
@@ -0,0 +1,45 @@
+from typing import Dict, List, Optional
+
+from app.core.metrics import observe_typesense
+from app.core.typesense_conf import client
+from app.domain.models.user import User
+from app.domain.services.search_backend import SearchBackend
+from app.infrastructure.user_index import ALIAS, to_document
+
+
+class TypesenseSearchBackend(SearchBackend):
+    def __init__(self, collection: str = ALIAS) -> None:
+        self.collection = collection
+
+    async def search(self, query: str, limit: int = 10) -> List[Dict]:
+        result = await observe_typesense(
+            "search",
+            client.collections[self.collection].documents.search,
+            {"q": query, "query_by": "username", "per_page": limit},
+        )
+        return [hit["document"] for hit in result["hits"]]
+
+    async def index(self, users: List[User]) -> List[Optional[str]]:
+        if not users:
+            return []
+
+        results = await observe_typesense(
+            "import",
+            client.collections[self.collection].documents.import_,
+            [to_document(user) for user in users],
+            {"action": "upsert"},
+        )
+        return [
+            None if result.get("success") else result.get("error", "not indexed")
+            for result in results
+        ]
+
+    async def remove(self, ids: List[int]) -> None:
+        if not ids:
+            return
+
+        await observe_typesense(
+            "delete_documents",
+            client.collections[self.collection].documents.delete,
+            {"filter_by": f"pk:[{','.join(str(id) for id in ids)}]"},
+        )
@@ -0,0 +1,240 @@
+import asyncio
+import base64
+import hashlib
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+import aiofiles
+from app.core.config import settings
+from app.core.tracing import traced
+from app.domain.models.attachment import Attachment, AttachmentUpload
+from app.domain.schemas.attachment import (AttachmentResponse, UploadCreate,
+                                           UploadResponse)
+from app.domain.services.base_service import BaseService
+from app.domain.services.single_flight import SingleFlight
+from app.infrastructure.attachment_files import (blob_path, publish,
+                                                 sha256_file, truncate,
+                                                 upload_path)
+from app.infrastructure.repositories.attachment_repository import \
+    AttachmentRepository
+from fastapi import HTTPException
+from pydantic import BaseModel
+from starlette.requests import ClientDisconnect
+
+
+@traced
+class AttachmentService(
+    BaseService[Attachment, UploadCreate, BaseModel, AttachmentRepository]
+):
+    def __init__(self, repository: AttachmentRepository, single_flight: SingleFlight):
+        super().__init__(repository, single_flight)
+
+    async def start_upload(self, user_id: str, schema: UploadCreate) -> UploadResponse:
+        if schema.size > settings.ATTACHMENT_MAX_SIZE:
+            raise HTTPException(status_code=413, detail="File is too large")
+
+        # content the user can already read, a forwarded file, is not sent again;
+        # anything else is uploaded in full as proof of having it, then stored once
+        known = await self.repository.get_by_sha256(schema.sha256)
+        if (
+            known is not None and
+            known.size == schema.size and
+            await self.repository.get_readable(user_id, known.id) is not None
+        ):
+            upload = await self.repository.create_upload(
+                self._new_upload(user_id, schema, offset=schema.size, known=known)
+            )
+            if upload is None:
+                raise HTTPException(status_code=500, detail="Failed to start upload")
+            return self._response(upload, known)
+
+        upload = await self.repository.find_open_upload(
+            user_id, schema.sha256, schema.size
+        )
+        if upload is None:
+            upload = await self.repository.create_upload(
+                self._new_upload(user_id, schema)
+            )
+            if upload is None:
+                raise HTTPException(status_code=500, detail="Failed to start upload")
+            path = upload_path(upload.id)
+            await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+            await asyncio.to_thread(path.touch)
+        return self._response(upload)
+
+    async def get_upload(self, user_id: str, upload_id: str) -> UploadResponse:
+        upload = await self._get_upload(user_id, upload_id)
+        return self._response(upload, await self._attachment_of(upload))
+
+    async def write_chunk(
+        self,
+        user_id: str,
+        upload_id: str,
+        offset: int,
+        body: AsyncIterator[bytes],
+        checksum: Optional[str] = None,
+    ) -> UploadResponse:
+        upload = await self._get_upload(user_id, upload_id)
+        if upload.attachment_id is not None:
+            return self._response(upload, await self._attachment_of(upload))
+        if upload.expires_at <= datetime.now(timezone.utc):
+            raise HTTPException(status_code=410, detail="Upload expired")
+        if offset != upload.offset:
+            raise HTTPException(
+                status_code=409,
+                detail="Offset does not match the upload",
+                headers={"Upload-Offset": str(upload.offset)},
+            )
+        if offset == upload.size:
+            # everything arrived before, only the completion is left to retry
+            return await self._complete(upload)
+
+        expected = self._parse_checksum(checksum)
+        limit = min(upload.size - offset, settings.ATTACHMENT_CHUNK_SIZE)
+        written, digest, disconnected = await self._write(
+            upload_path(upload.id), offset, limit, body
+        )
+
+        if expected is not None and digest != expected:
+            # 460 as in tus, the offset stays where it was
+            raise HTTPException(status_code=460, detail="Chunk checksum mismatch")
+        # without a checksum, what arrived before a dropped connection is kept
+        # and the client resumes from there
+        if written and not await self.repository.advance_upload(
+            upload.id,
+            offset,
+            offset + written,
+            datetime.now(timezone.utc) +
+            timedelta(seconds=settings.ATTACHMENT_UPLOAD_TTL),
+        ):
+            raise HTTPException(status_code=409, detail="Upload changed meanwhile")
+        if disconnected:
+            raise HTTPException(status_code=400, detail="Client disconnected")
+
+        upload.offset = offset + written
+        if upload.offset < upload.size:
+            return self._response(upload)
+        return await self._complete(upload)
+
+    async def open(
+        self, user_id: str, attachment_id: int
+    ) -> Tuple[Path, AttachmentResponse]:
+        readable = await self.repository.get_readable(user_id, attachment_id)
+        if readable is None:
+            raise HTTPException(status_code=404, detail="Attachment not found")
+        attachment, source = readable
+        return blob_path(attachment.sha256), AttachmentResponse.named(
+            attachment, source
+        )
+
+    async def _complete(self, upload: AttachmentUpload) -> UploadResponse:
+        path = upload_path(upload.id)
+        # the file is only moved into the blobs once its hash matched, after
+        # that a failed completion is retried without reading it again
+        if await asyncio.to_thread(path.exists):
+            sha256 = await asyncio.to_thread(sha256_file, path)
+            if sha256 != upload.sha256:
+                # a chunk went wrong somewhere without a checksum to catch it
+                await self.repository.reset_upload(upload.id)
+                await asyncio.to_thread(truncate, path)
+                raise HTTPException(
+                    status_code=422,
+                    detail="File hash mismatch, the upload starts over",
+                    headers={"Upload-Offset": "0"},
+                )
+            await asyncio.to_thread(publish, path, sha256)
+        elif not await asyncio.to_thread(blob_path(upload.sha256).exists):
+            raise HTTPException(status_code=500, detail="Upload file is missing")
+
+        attachment = await self.repository.complete_upload(upload)
+        if attachment is None:
+            raise HTTPException(status_code=500, detail="Failed to store attachment")
+        return self._response(upload, attachment)
+
+    @staticmethod
+    async def _write(
+        path: Path, offset: int, limit: int, body: AsyncIterator[bytes]
+    ) -> Tuple[int, bytes, bool]:
+        # each piece goes to disk as it arrives, nothing is buffered per chunk
+        digest = hashlib.sha256()
+        written = 0
+        disconnected = False
+        async with aiofiles.open(path, "r+b") as f:
+            await f.seek(offset)
+            try:
+                async for data in body:
+                    if written + len(data) > limit:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"Chunk exceeds {limit} bytes",
+                            headers={"Upload-Offset": str(offset)},
+                        )
+                    await f.write(data)
+                    digest.update(data)
+                    written += len(data)
+            except ClientDisconnect:
+                disconnected = True
+        return written, digest.digest(), disconnected
+
+    async def _get_upload(self, user_id: str, upload_id: str) -> AttachmentUpload:
+        upload = await self.repository.get_upload(upload_id, user_id)
+        if upload is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return upload
+
+    async def _attachment_of(self, upload: AttachmentUpload) -> Optional[Attachment]:
+        if upload.attachment_id is None:
+            return None
+        return await self.repository.get(upload.attachment_id)
+
+    @staticmethod
+    def _new_upload(
+        user_id: str,
+        schema: UploadCreate,
+        offset: int = 0,
+        known: Optional[Attachment] = None,
+    ) -> AttachmentUpload:
+        return AttachmentUpload(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            sha256=schema.sha256,
+            size=schema.size,
+            content_type=schema.content_type,
+            filename=schema.filename,
+            offset=offset,
+            attachment_id=known.id if known is not None else None,
+            expires_at=datetime.now(timezone.utc) +
+            timedelta(seconds=settings.ATTACHMENT_UPLOAD_TTL),
+        )
+
+    @staticmethod
+    def _response(
+        upload: AttachmentUpload, attachment: Optional[Attachment] = None
+    ) -> UploadResponse:
+        return UploadResponse(
+            id=upload.id,
+            size=upload.size,
+            offset=upload.offset,
+            chunk_size=settings.ATTACHMENT_CHUNK_SIZE,
+            expires_at=upload.expires_at,
+            attachment=(
+                AttachmentResponse.named(attachment, upload)
+                if attachment is not None
+                else None
+            ),
+        )
+
+    @staticmethod
+    def _parse_checksum(checksum: Optional[str]) -> Optional[bytes]:
+        # "sha256 <base64 digest>", as in the tus Upload-Checksum header
+        if not checksum:
+            return None
+        algorithm, _, value = checksum.strip().partition(" ")
+        if algorithm.lower() != "sha256":
+            raise HTTPException(status_code=400, detail="Only sha256 is supported")
+        try:
+            return base64.b64decode(value.strip(), validate=True)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Malformed checksum")
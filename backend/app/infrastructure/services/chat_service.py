@@ -1,19 +1,45 @@
 import logging
-from typing import List
+from typing import Dict, List, Optional, Sequence
 
 import socketio
+from app.core.tracing import traced
 from app.domain.models.chat import Chat
 from app.domain.schemas.chat import ChatCreate
 from app.domain.services.base_service import BaseService, CreateSchemaType
+from app.domain.services.single_flight import SingleFlight
+from app.infrastructure.loaders import UserLoader
+from app.infrastructure.message_buffer import MessageRingBuffer
 from app.infrastructure.repositories.chat_repository import ChatRepository
 from fastapi import HTTPException
 from pydantic import BaseModel
+from sqlalchemy.orm.attributes import set_committed_value
 
 
+@traced
 class ChatService(BaseService[Chat, ChatCreate, BaseModel, ChatRepository]):
-    def __init__(self, repository: ChatRepository, sio: socketio.AsyncServer):
-        super().__init__(repository)
+    def __init__(
+        self,
+        repository: ChatRepository,
+        sio: socketio.AsyncServer,
+        message_buffer: MessageRingBuffer,
+        user_loader: UserLoader,
+        single_flight: SingleFlight,
+    ):
+        super().__init__(repository, single_flight)
         self.sio = sio
+        self.message_buffer = message_buffer
+        self.user_loader = user_loader
+
+    async def delete(self, id: int) -> bool:
+        is_deleted = await super().delete(id)
+        self.message_buffer.evict(id)
+        return is_deleted
+
+    async def delete_many(self, ids: Sequence[int]) -> List[int]:
+        deleted = await super().delete_many(ids)
+        for id in deleted:
+            self.message_buffer.evict(id)
+        return deleted
 
     async def create_chat(self, schema: CreateSchemaType) -> Chat:
         try:
@@ -31,7 +57,21 @@ class ChatService(BaseService[Chat, ChatCreate, BaseModel, ChatRepository]):
 
     async def get_user_chats(self, user_id: str) -> List[Chat]:
         try:
-            return await self.repository.get_user_chats(user_id)
+            chats = await self.repository.get_user_chats(user_id) or []
+            member_ids = await self.repository.get_member_ids(
+                [chat.id for chat in chats]
+            ) or {}
+            users = await self.user_loader.load_many(
+                id for ids in member_ids.values() for id in ids
+            )
+
+            for chat in chats:
+                members = [
+                    users[id] for id in member_ids.get(chat.id, []) if id in users
+                ]
+                set_committed_value(chat, "members", members)
+
+            return chats
         except HTTPException:
             raise
         except Exception as e:
@@ -40,3 +80,68 @@ class ChatService(BaseService[Chat, ChatCreate, BaseModel, ChatRepository]):
                 status_code=500,
                 detail="Failed to get user chat. Please try again later.",
             )
+
+    async def get_chat_partner_ids(self, user_id: str) -> List[str]:
+        try:
+            return await self.repository.get_chat_partner_ids(user_id) or []
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to get chat partners: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to get chat partners. Please try again later.",
+            )
+
+    async def get_unread_counts(self, user_id: str) -> Dict[int, int]:
+        try:
+            return await self.repository.get_unread_counts(user_id) or {}
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to get unread counts: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to get unread counts. Please try again later.",
+            )
+
+    async def get_version(self, chat_id: int) -> Optional[int]:
+        try:
+            return await self.repository.get_version(chat_id)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to get chat version: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to get chat version. Please try again later.",
+            )
+
+    async def ensure_member(self, chat_id: int, user_id: str) -> None:
+        # 404 rather than 403, a chat the user isn't in doesn't exist for them
+        try:
+            if not await self.repository.is_member(chat_id, user_id):
+                raise HTTPException(status_code=404, detail="Chat not found")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to check chat membership: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to check chat membership. Please try again later.",
+            )
+
+    async def get_user_chats_version(self, user_id: str) -> Optional[str]:
+        try:
+            state = await self.repository.get_user_chats_state(user_id)
+            if state is None:
+                return None
+            return state[:16]
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error(f"Failed to get user chats version: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to get user chats version. Please try again later.",
+            )
@@ -1,23 +1,68 @@
 import logging
-from typing import List
+from typing import AsyncIterator, Callable, List, Optional, Sequence
 
 import socketio
+from app.core.config import settings
+from app.core.database import UnitOfWork
+from app.core.tracing import traced
 from app.domain.models.message import Message
+from app.domain.schemas.attachment import AttachmentResponse
 from app.domain.schemas.message import BaseModel, MessageCreate
 from app.domain.services.base_service import BaseService, CreateSchemaType
+from app.domain.services.single_flight import SingleFlight
+from app.infrastructure.message_archive import MessageArchiveStore
+from app.infrastructure.message_buffer import MessageRingBuffer
+from app.infrastructure.repositories.attachment_repository import \
+    AttachmentRepository
 from app.infrastructure.repositories.message_repository import \
     MessageRepository
 from fastapi import HTTPException
 
 
+@traced
 class MessageService(BaseService[Message, MessageCreate, BaseModel, MessageRepository]):
-    def __init__(self, repository: MessageRepository, sio: socketio.AsyncServer):
-        super().__init__(repository)
+    def __init__(
+        self,
+        repository: MessageRepository,
+        sio: socketio.AsyncServer,
+        buffer: MessageRingBuffer,
+        archive: MessageArchiveStore,
+        attachment_repository: AttachmentRepository,
+        unit_of_work: Callable[[], UnitOfWork],
+        single_flight: SingleFlight,
+    ):
+        super().__init__(repository, single_flight)
         self.sio = sio
+        self.buffer = buffer
+        self.archive = archive
+        self.attachment_repository = attachment_repository
+        self.unit_of_work = unit_of_work
 
-    async def create_and_send_message(self, schema: CreateSchemaType) -> Message:
+    async def create_and_send_message(
+        self, schema: CreateSchemaType, attachment_ids: Sequence[int] = ()
+    ) -> Message:
         try:
+            attachments = []
+            if attachment_ids:
+                attachment_ids = sorted(set(attachment_ids))
+                owned = await self.attachment_repository.get_owned(
+                    schema.sender_id, attachment_ids
+                )
+                if owned is None or len(owned) != len(attachment_ids):
+                    raise HTTPException(status_code=400, detail="Unknown attachment")
+                attachments = [
+                    AttachmentResponse.named(attachment, upload)
+                    for attachment, upload in owned
+                ]
+
             message = await self.repository.create(schema)
+            if message is not None:
+                if attachments:
+                    await self.attachment_repository.attach(
+                        message.id, message.chat_id, attachments
+                    )
+                    message.attachments = attachments
+                self.buffer.append(message, message.chat_version)
 
             return message
 
@@ -30,9 +75,40 @@ class MessageService(BaseService[Message, MessageCreate, BaseModel, MessageRepos
                 detail="Failed to create message. Please try again later.",
             )
 
-    async def get_chat_messages(self, chat_id: int) -> List[Message]:
+    async def get_chat_messages(
+        self,
+        chat_id: int,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        version: Optional[int] = None,
+    ) -> List[Message]:
+        # version is the chats.version read before anything else, without it
+        # the ring buffer can't tell whether it is current
         try:
-            return await self.repository.get_chat_messages(chat_id)
+            if before_id is not None or version is None:
+                messages = await self.repository.get_chat_messages(
+                    chat_id, limit, before_id
+                )
+                messages = await self._with_archived(
+                    chat_id, messages, limit, before_id
+                )
+                return await self._with_attachments(messages)
+
+            messages = self.buffer.get_page(chat_id, version, limit)
+            if messages is not None:
+                return messages
+
+            messages = await self.repository.get_chat_messages(chat_id, limit)
+            messages = await self._with_archived(chat_id, messages, limit)
+            messages = await self._with_attachments(messages)
+            if messages is not None:
+                self.buffer.fill(
+                    chat_id,
+                    version,
+                    messages,
+                    complete=limit is None or len(messages) < limit,
+                )
+            return messages
         except HTTPException:
             raise
         except Exception as e:
@@ -41,3 +117,53 @@ class MessageService(BaseService[Message, MessageCreate, BaseModel, MessageRepos
                 status_code=500,
                 detail="Failed to get chat messages. Please try again later.",
             )
+
+    async def export_chat_messages(self, chat_id: int) -> AsyncIterator[List[Message]]:
+        # archived history first, the live partitions follow in id order. One
+        # unit of work for all of it, the attachment lookups run on the session
+        # the cursor is open in rather than closing it
+        async with self.unit_of_work():
+            async for chunk in self.archive.iter_chat(chat_id):
+                yield await self._with_attachments(chunk)
+
+            async for chunk in self.repository.stream_chat_messages(
+                chat_id, settings.EXPORT_CHUNK_SIZE
+            ):
+                yield await self._with_attachments(chunk)
+
+    async def _with_archived(
+        self,
+        chat_id: int,
+        messages: Optional[List[Message]],
+        limit: Optional[int],
+        before_id: Optional[int] = None,
+    ) -> Optional[List[Message]]:
+        # archived partitions are read only once the live ones run out, the
+        # index in the database is shared by every worker
+        if messages is None or (limit is not None and len(messages) >= limit):
+            return messages
+
+        older = await self.archive.read(
+            chat_id,
+            limit=None if limit is None else limit - len(messages),
+            before_id=messages[0].id if messages else before_id,
+        )
+        return older + list(messages)
+
+    async def _with_attachments(
+        self, messages: Optional[List[Message]]
+    ) -> Optional[List[Message]]:
+        # a plain attribute read by MessageResponse, not a mapped relationship
+        if not messages:
+            return messages
+
+        attachments = await self.attachment_repository.get_for_messages(
+            [message.id for message in messages]
+        )
+        for message in messages:
+            if message.id in (attachments or {}):
+                message.attachments = [
+                    AttachmentResponse.named(attachment, link)
+                    for attachment, link in attachments[message.id]
+                ]
+        return messages
@@ -0,0 +1,114 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.domain.schemas.user import UserCreate
+from pydantic import ValidationError
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+Row = Tuple[int, Optional[UserCreate], Optional[str]]
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in (
+        "application/x-ndjson",
+        "application/ndjson",
+        "application/jsonl",
+    ):
+        return NDJSON
+    if content_type in ("text/csv", "application/csv"):
+        return CSV
+    return None
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_length: int = settings.USER_IMPORT_MAX_LINE
+) -> AsyncIterator[Optional[bytes]]:
+    # lines are left undecoded so a bad one is a row error in parse_rows; one
+    # over max_length comes out as None and its bytes are dropped as they arrive
+    pieces: List[bytes] = []
+    length = 0
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            piece = chunk[start:] if end == -1 else chunk[start:end]
+            length += len(piece)
+            if length <= max_length:
+                pieces.append(piece)
+            else:
+                pieces = []
+            if end == -1:
+                break
+            yield b"".join(pieces).rstrip(b"\r") if length <= max_length else None
+            pieces, length = [], 0
+            start = end + 1
+    if length > max_length:
+        yield None
+    elif length:
+        yield b"".join(pieces).rstrip(b"\r")
+
+
+def _validate(line_number: int, data: Dict) -> Row:
+    try:
+        return line_number, UserCreate.model_validate(data), None
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+            for error in e.errors()
+        )
+        return line_number, None, errors
+
+
+async def parse_rows(
+    lines: AsyncIterator[Optional[bytes]], fmt: str
+) -> AsyncIterator[Row]:
+    header: Optional[List[str]] = None
+    line_number = 0
+
+    async for raw in lines:
+        line_number += 1
+        if raw is None:
+            yield (
+                line_number,
+                None,
+                f"line longer than {settings.USER_IMPORT_MAX_LINE} bytes",
+            )
+            continue
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            yield line_number, None, f"invalid utf-8 at byte {e.start}"
+            continue
+        if not line.strip():
+            continue
+
+        if fmt == NDJSON:
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"invalid json: {e.msg}"
+                continue
+            if not isinstance(data, dict):
+                yield line_number, None, "expected a json object"
+                continue
+        else:
+            # records are one per line, quoted newlines are not supported
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            if len(values) != len(header):
+                yield (
+                    line_number,
+                    None,
+                    f"expected {len(header)} columns, got {len(values)}",
+                )
+                continue
+            data = {key: value or None for key, value in zip(header, values)}
+
+        yield _validate(line_number, data)
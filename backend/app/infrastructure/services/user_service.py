@@ -1,22 +1,43 @@
+import asyncio
+import json
+import logging
+import time
 from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Sequence
 
 import aiofiles
-from app.core.typesense_conf import client
+from app.core.config import settings
+from app.core.tracing import traced, tracer
 from app.domain.models.user import User
 from app.domain.schemas.user import UserCreate, UserUpdate
 from app.domain.services.base_service import (BaseService, CreateSchemaType,
                                               ModelType, UpdateSchemaType)
+from app.domain.services.search_backend import SearchBackend
+from app.domain.services.single_flight import SingleFlight
 from app.infrastructure.repositories.user_repository import UserRepository
+from app.infrastructure.services.user_import import Row, parse_rows
 from fastapi import File, HTTPException
 
+logger = logging.getLogger(__name__)
 
+
+@traced
 class UserService(BaseService[User, UserCreate, UserUpdate, UserRepository]):
-    def __init__(self, repository: UserRepository):
-        super().__init__(repository)
+    def __init__(
+        self,
+        repository: UserRepository,
+        single_flight: SingleFlight,
+        search_backend: SearchBackend,
+    ):
+        super().__init__(repository, single_flight)
+        self.search_backend = search_backend
 
     async def get_by_supertokens_id(self, id: str):
         try:
-            return await self.repository.get_by_supertokens_id(id)
+            return await self.single_flight.do(
+                ("get_by_supertokens_id", id),
+                lambda: self.repository.get_by_supertokens_id(id),
+            )
         except HTTPException:
             raise
         except Exception as e:
@@ -28,21 +49,19 @@ class UserService(BaseService[User, UserCreate, UserUpdate, UserRepository]):
         try:
             if user_image:
                 file_path = Path("/app/media") / id / user_image.filename
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                async with aiofiles.open(file_path, "wb") as f:
-                    await f.write(await user_image.read())
+                await asyncio.to_thread(
+                    file_path.parent.mkdir, parents=True, exist_ok=True
+                )
+                with tracer.start_as_current_span(
+                    "avatar write", attributes={"file.path": str(file_path)}
+                ):
+                    async with aiofiles.open(file_path, "wb") as f:
+                        await f.write(await user_image.read())
 
             user = await self.repository.update_by_supertokens_id(id, schema)
 
             if user:
-                typesense_data = {
-                    "id": id,
-                    "supertokens_id": user.supertokens_id,
-                    "email": user.email,
-                    "username": user.username,
-                    "avatar_url": user.avatar_url or "",
-                }
-                client.collections["users"].documents.upsert(typesense_data)
+                await self._index_user(user)
 
             return user
 
@@ -57,14 +76,7 @@ class UserService(BaseService[User, UserCreate, UserUpdate, UserRepository]):
         try:
             user = await self.repository.create(schema)
 
-            user_data = {
-                "id": user.supertokens_id,
-                "supertokens_id": user.supertokens_id,
-                "username": user.username,
-                "email": user.email,
-                "avatar_url": user.avatar_url or "",
-            }
-            client.collections["users"].documents.create(user_data)
+            await self._index_user(user)
 
             return user
         except HTTPException:
@@ -76,16 +88,162 @@ class UserService(BaseService[User, UserCreate, UserUpdate, UserRepository]):
 
     async def search_user(self, username: str):
         try:
-            result = client.collections["users"].documents.search(
-                {
-                    "q": username,
-                    "query_by": "username",
-                }
+            documents = await self.single_flight.do(
+                ("search_user", username),
+                lambda: self.search_backend.search(username),
             )
-            return result["hits"][0]["document"]
+            if not documents:
+                raise HTTPException(status_code=404, detail="User not found")
+            return documents[0]
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Can't find an object: {str(e)}"
             )
+
+    async def create_many(self, schemas: Sequence[CreateSchemaType]) -> List[User]:
+        users = await super().create_many(schemas)
+        await self._index_users(users)
+        return users
+
+    async def update_many(
+        self, ids: Sequence[int], schema: UpdateSchemaType
+    ) -> List[User]:
+        users = await super().update_many(ids, schema)
+        await self._index_users(users)
+        return users
+
+    async def delete_many(self, ids: Sequence[int]) -> List[int]:
+        deleted = await super().delete_many(ids)
+        if deleted:
+            try:
+                await self.search_backend.remove(deleted)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=500, detail=f"Can't unindex users: {str(e)}"
+                )
+        return deleted
+
+    async def _index_user(self, user: User) -> None:
+        await self._index_users([user])
+
+    async def _index_users(self, users: List[User]) -> None:
+        if not users:
+            return
+        for error in await self.search_backend.index(users):
+            if error:
+                raise HTTPException(
+                    status_code=500, detail=f"Can't index user: {error}"
+                )
+
+    async def import_users(
+        self,
+        lines: AsyncIterator[Optional[bytes]],
+        fmt: str,
+        batch_size: int = settings.USER_IMPORT_BATCH_SIZE,
+    ) -> AsyncIterator[str]:
+        started_at = time.monotonic()
+        totals = {"rows": 0, "inserted": 0, "skipped": 0, "failed": 0, "indexed": 0}
+        batch: List[Row] = []
+        indexing: Optional[asyncio.Task] = None
+
+        def report(kind: str, **data) -> str:
+            return json.dumps({"type": kind, **data}) + "\n"
+
+        async def flush() -> AsyncIterator[str]:
+            nonlocal batch, indexing
+            inserted, errors = await self._import_batch(batch, totals)
+            batch = []
+            for error in errors:
+                yield report("error", **error)
+
+            # the previous batch is indexed while this one is read and inserted
+            if indexing is not None:
+                for error in await indexing:
+                    yield report("error", **error)
+            indexing = asyncio.create_task(self._index_batch(inserted, totals))
+
+            yield report(
+                "progress", **totals, elapsed=round(time.monotonic() - started_at, 3)
+            )
+
+        try:
+            async for row in parse_rows(lines, fmt):
+                totals["rows"] += 1
+                line_number, _, error = row
+                if error is not None:
+                    totals["failed"] += 1
+                    yield report("error", line=line_number, error=error)
+                    continue
+
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    async for message in flush():
+                        yield message
+
+            if batch:
+                async for message in flush():
+                    yield message
+
+            if indexing is not None:
+                for error in await indexing:
+                    yield report("error", **error)
+                indexing = None
+        finally:
+            if indexing is not None:
+                indexing.cancel()
+
+        elapsed = time.monotonic() - started_at
+        logger.info(f"Imported users: {totals} in {elapsed:.3f}s")
+        yield report("summary", **totals, elapsed=round(elapsed, 3))
+
+    async def _import_batch(self, batch: List[Row], totals: Dict):
+        # rows are matched back to their lines by supertokens_id
+        rows: Dict[str, Row] = {}
+        errors = []
+        for line_number, user, error in batch:
+            if user.supertokens_id in rows:
+                totals["skipped"] += 1
+                errors.append({"line": line_number, "error": "duplicate in batch"})
+                continue
+            rows[user.supertokens_id] = (line_number, user, error)
+
+        try:
+            inserted = await self.repository.insert_ignoring_conflicts(
+                [user.model_dump() for _, user, _ in rows.values()]
+            )
+        except HTTPException as e:
+            totals["failed"] += len(rows)
+            errors.extend(
+                {"line": line_number, "error": e.detail}
+                for line_number, _, _ in rows.values()
+            )
+            return [], errors
+
+        inserted_ids = {user.supertokens_id for user in inserted}
+        totals["inserted"] += len(inserted)
+        for supertokens_id, (line_number, _, _) in rows.items():
+            if supertokens_id not in inserted_ids:
+                totals["skipped"] += 1
+                errors.append({"line": line_number, "error": "already exists"})
+
+        return inserted, errors
+
+    async def _index_batch(self, users: List[User], totals: Dict) -> List[Dict]:
+        if not users:
+            return []
+
+        try:
+            results = await self.search_backend.index(users)
+        except Exception as e:
+            logger.error(f"Failed to index imported users: {e}")
+            results = [str(e)] * len(users)
+
+        errors = []
+        for user, error in zip(users, results):
+            if error is None:
+                totals["indexed"] += 1
+            else:
+                errors.append({"supertokens_id": user.supertokens_id, "error": error})
+        return errors
@@ -0,0 +1,303 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import observe_typesense
+from app.core.typesense_conf import UserSchema, client
+from app.domain.models.user import User
+from app.infrastructure.repositories.user_repository import UserRepository
+from typesense.exceptions import ObjectNotFound
+
+logger = logging.getLogger(__name__)
+
+# searches and writes go through the alias, never the versioned collection
+ALIAS = UserSchema["name"]
+
+
+def to_timestamp(at: Optional[datetime]) -> Optional[int]:
+    return int(at.timestamp() * 1000) if at is not None else None
+
+
+def to_document(user: User) -> Dict:
+    document = {
+        "id": user.supertokens_id,
+        "pk": user.id,
+        "supertokens_id": user.supertokens_id,
+        "username": user.username,
+        "email": user.email,
+        "avatar_url": user.avatar_url or "",
+    }
+    updated_at = to_timestamp(user.updated_at)
+    if updated_at is not None:
+        document["updated_at"] = updated_at
+    return document
+
+
+class UserSearchIndex:
+    def __init__(
+        self,
+        repository: UserRepository,
+        batch_size: int = settings.SEARCH_INDEX_BATCH_SIZE,
+        reconcile_interval: float = settings.SEARCH_RECONCILE_INTERVAL,
+    ) -> None:
+        self.repository = repository
+        self.batch_size = batch_size
+        self._interval = reconcile_interval
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self.last_rebuild: Optional[Dict] = None
+        self.last_reconcile: Optional[Dict] = None
+
+    @property
+    def rebuilding(self) -> bool:
+        return self._rebuild_task is not None and not self._rebuild_task.done()
+
+    async def current_collection(self) -> Optional[str]:
+        try:
+            alias = await observe_typesense(
+                "retrieve_alias", client.aliases[ALIAS].retrieve
+            )
+        except ObjectNotFound:
+            return None
+        return alias["collection_name"]
+
+    async def ensure_collection(self) -> None:
+        async with self._lock:
+            if await self.current_collection() is not None:
+                return
+            try:
+                # deployments from before the alias was introduced
+                await observe_typesense(
+                    "retrieve_collection", client.collections[ALIAS].retrieve
+                )
+                return
+            except ObjectNotFound:
+                pass
+
+            collection = self._versioned_name()
+            await observe_typesense(
+                "create_collection",
+                client.collections.create,
+                {**UserSchema, "name": collection},
+            )
+            await observe_typesense(
+                "upsert_alias",
+                client.aliases.upsert,
+                ALIAS,
+                {"collection_name": collection},
+            )
+            logger.info(f"Created users search collection {collection}")
+
+    def start_rebuild(self) -> bool:
+        if self.rebuilding:
+            return False
+
+        self._rebuild_task = asyncio.create_task(self._rebuild_logged())
+        return True
+
+    async def _rebuild_logged(self) -> None:
+        try:
+            await self.rebuild()
+        except Exception as e:
+            logger.error(f"Failed to rebuild the users search index: {e}")
+            self.last_rebuild = {"error": str(e)}
+
+    async def rebuild(self) -> Dict:
+        async with self._lock:
+            started_at = time.monotonic()
+            collection = self._versioned_name()
+            await observe_typesense(
+                "create_collection",
+                client.collections.create,
+                {**UserSchema, "name": collection},
+            )
+            logger.info(f"Rebuilding users search index into {collection}")
+
+            try:
+                indexed = 0
+                async for batch in self.repository.iter_batches(self.batch_size):
+                    indexed += await self._import(collection, batch)
+
+                # catch up on writes that went through the alias while streaming
+                await self._reconcile(collection)
+                previous = await self._swap(collection)
+            except BaseException:
+                await self._drop(collection)
+                raise
+
+            # and on the ones made between the catch-up and the swap
+            await self._reconcile(ALIAS)
+            if previous is not None:
+                await self._drop(previous)
+
+            self.last_rebuild = {
+                "collection": collection,
+                "previous": previous,
+                "indexed": indexed,
+                "elapsed": round(time.monotonic() - started_at, 3),
+            }
+            logger.info(f"Rebuilt users search index: {self.last_rebuild}")
+            return self.last_rebuild
+
+    async def reconcile(self) -> Dict:
+        async with self._lock:
+            return await self._reconcile(ALIAS)
+
+    async def _reconcile(self, collection: str) -> Dict:
+        started_at = time.monotonic()
+        if not await self._has_pk(collection):
+            # indexed before documents carried users.id, a rebuild adds it
+            self.start_rebuild()
+            return {"collection": collection, "rebuild": True}
+
+        # one window of users.id at a time, neither side is held in full
+        upserted = deleted = 0
+        after = 0
+        while True:
+            upto = await self.repository.get_index_bound(after, self.batch_size)
+            stale, extra = await self._compare(collection, after, upto)
+            upserted += len(stale)
+            deleted += len(extra)
+
+            if stale:
+                users = await self.repository.get_many_by_supertokens_ids(stale)
+                await self._import(collection, users or [])
+            # a window of deleted users can hold more than a batch
+            for ids in self._chunks(extra):
+                filter_by = ",".join(f"`{supertokens_id}`" for supertokens_id in ids)
+                await observe_typesense(
+                    "delete_documents",
+                    client.collections[collection].documents.delete,
+                    {"filter_by": f"supertokens_id:=[{filter_by}]"},
+                )
+            if upto is None:
+                break
+            after = upto
+
+        result = {
+            "collection": collection,
+            "upserted": upserted,
+            "deleted": deleted,
+            "elapsed": round(time.monotonic() - started_at, 3),
+        }
+        if upserted or deleted:
+            logger.info(f"Repaired users search index drift: {result}")
+        self.last_reconcile = result
+        return result
+
+    async def _compare(
+        self, collection: str, after: int, upto: Optional[int]
+    ) -> Tuple[List[str], List[str]]:
+        # export before reading Postgres so users created in between are not
+        # mistaken for deleted ones
+        filter_by = f"pk:>{after}"
+        if upto is not None:
+            filter_by += f" && pk:<={upto}"
+        exported = await observe_typesense(
+            "export",
+            client.collections[collection].documents.export,
+            {"filter_by": filter_by, "include_fields": "id,updated_at"},
+        )
+        indexed: Dict[str, Optional[int]] = {}
+        for line in exported.splitlines():
+            if line:
+                document = json.loads(line)
+                indexed[document["id"]] = document.get("updated_at")
+
+        expected = await self.repository.get_index_state(after, upto)
+        stale = [
+            supertokens_id
+            for supertokens_id, updated_at in expected.items()
+            if supertokens_id not in indexed or
+            indexed[supertokens_id] != to_timestamp(updated_at)
+        ]
+        extra = [
+            supertokens_id
+            for supertokens_id in indexed
+            if supertokens_id not in expected
+        ]
+        return stale, extra
+
+    async def _has_pk(self, collection: str) -> bool:
+        if collection == ALIAS:
+            collection = await self.current_collection() or ALIAS
+        schema = await observe_typesense(
+            "retrieve_collection", client.collections[collection].retrieve
+        )
+        return any(field["name"] == "pk" for field in schema.get("fields", []))
+
+    async def _import(self, collection: str, users: List[User]) -> int:
+        if not users:
+            return 0
+
+        results = await observe_typesense(
+            "import",
+            client.collections[collection].documents.import_,
+            [to_document(user) for user in users],
+            {"action": "upsert"},
+        )
+        failed = [result for result in results if not result.get("success")]
+        if failed:
+            logger.error(
+                f"Failed to index {len(failed)} users into {collection}: "
+                f"{failed[0].get('error')}"
+            )
+        return len(results) - len(failed)
+
+    async def _swap(self, collection: str) -> Optional[str]:
+        previous = await self.current_collection()
+        await observe_typesense(
+            "upsert_alias",
+            client.aliases.upsert,
+            ALIAS,
+            {"collection_name": collection},
+        )
+        if previous is None:
+            # a plain collection named like the alias takes precedence over it,
+            # requests keep hitting it until it is dropped
+            await self._drop(ALIAS)
+        return previous
+
+    async def _drop(self, collection: str) -> None:
+        try:
+            await observe_typesense(
+                "delete_collection", client.collections[collection].delete
+            )
+        except ObjectNotFound:
+            pass
+
+    @staticmethod
+    def _versioned_name() -> str:
+        return f"{ALIAS}_{int(time.time() * 1000)}"
+
+    def _chunks(self, ids: List[str]):
+        for i in range(0, len(ids), self.batch_size):
+            yield ids[i:i + self.batch_size]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Failed to reconcile the users search index: {e}")
+
+    def start(self) -> None:
+        if self._task is None and self._interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._rebuild_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._rebuild_task = None
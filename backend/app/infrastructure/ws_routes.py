@@ -1,28 +1,130 @@
 import logging
+import random
+import time
 from datetime import datetime
-from typing import Dict
+from typing import Callable, Dict, List, Optional
 
 import socketio
+from app.core.metrics import REQUEST_DB_STATEMENTS, SOCKET_EVENT_SECONDS
+from app.core.query_stats import query_scope
+from app.core.tracing import extract, tracer
+from app.infrastructure.activity import ActivityBuffer
+from app.infrastructure.presence import PresenceHub
+from app.infrastructure.presence_store import PresenceStore
+from app.infrastructure.rate_limit import RateLimiter
+from app.infrastructure.services.chat_service import ChatService
+from opentelemetry.trace import SpanKind
 
 logger = logging.getLogger(__name__)
 
 
 class ChatNamespace(socketio.AsyncNamespace):
-    def __init__(self, namespace=None):
+    def __init__(
+        self,
+        namespace=None,
+        chat_service: Optional[Callable[[], ChatService]] = None,
+        activity: Optional[ActivityBuffer] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        presence_store: Optional[PresenceStore] = None,
+    ):
         super().__init__(namespace)
+        self.chat_service = chat_service
+        self.activity = activity
+        self.rate_limiter = rate_limiter
         self.active_users: Dict[str, str] = {}
-        self.online_users: Dict[str, bool] = {}
+        self.presence = PresenceHub(self.emit, store=presence_store)
+        self.in_flight = 0
+
+    async def trigger_event(self, event, *args):
+        # clients pick event names, only the handled ones get their own label
+        label = event if hasattr(self, f"on_{event}") else "unhandled"
+        started_at = time.perf_counter()
+        self.in_flight += 1
+        # a REST write passes its traceparent on with the socket event that follows
+        payload = args[1] if len(args) > 1 and isinstance(args[1], dict) else {}
+        with query_scope(f"socket {label}") as stats, tracer.start_as_current_span(
+            f"socket {label}",
+            context=extract(payload),
+            kind=SpanKind.SERVER,
+            attributes={"socketio.sid": args[0] if args else ""},
+        ):
+            try:
+                result = await self._trigger_event(event, *args)
+                stats.check_budget()
+                return result
+            finally:
+                self.in_flight -= 1
+                SOCKET_EVENT_SECONDS.labels(label).observe(
+                    time.perf_counter() - started_at
+                )
+                REQUEST_DB_STATEMENTS.labels(f"socket {label}").observe(stats.count)
+
+    async def _trigger_event(self, event, *args):
+        if self.rate_limiter is None or event in ("connect", "disconnect"):
+            return await super().trigger_event(event, *args)
+
+        sid = args[0]
+        if self.rate_limiter.allow(sid, self.active_users.get(sid), event):
+            return await super().trigger_event(event, *args)
+
+        if self.rate_limiter.should_disconnect(sid):
+            logger.warning(
+                "Disconnecting rate limited client", extra={"event": event, "sid": sid}
+            )
+            await self.disconnect(sid)
+
+    async def emit(self, event, data=None, to=None, room=None, **kwargs):
+        target = to or room
+        if self.rate_limiter is not None and isinstance(target, str):
+            backlog = self._outbound_backlog(target)
+            if self.rate_limiter.is_slow_consumer(backlog):
+                if self.rate_limiter.on_slow_consumer(event):
+                    logger.warning(
+                        "Disconnecting slow consumer",
+                        extra={"event": event, "sid": target},
+                    )
+                    await self.disconnect(target)
+                return
+
+        with tracer.start_as_current_span(f"emit {event}", kind=SpanKind.PRODUCER):
+            await super().emit(event, data, to=to, room=room, **kwargs)
+
+    def connected_sids(self) -> List[str]:
+        try:
+            participants = self.server.manager.get_participants(self.namespace, None)
+            return [sid for sid, _ in participants]
+        except KeyError:
+            return []
+
+    def outbound_backlog(self) -> int:
+        return sum(self._outbound_backlog(sid) for sid in self.connected_sids())
+
+    async def advise_reconnect(self, jitter: float) -> None:
+        for sid in self.connected_sids():
+            delay = int(random.uniform(0, jitter) * 1000)
+            await self.emit("reconnect_advice", {"delay": delay}, room=sid)
+
+    def _outbound_backlog(self, sid: str) -> int:
+        try:
+            eio_sid = self.server.manager.eio_sid_from_sid(sid, self.namespace)
+            socket = self.server.eio.sockets.get(eio_sid)
+        except Exception:
+            return 0
+
+        return socket.queue.qsize() if socket is not None else 0
 
     async def on_connect(self, sid, environ):
-        logging.info(f"[CONNECT] New connection, SID: {sid}")
+        logger.info("Connected", extra={"event": "connect", "sid": sid})
 
     async def on_set_user_id(self, sid, data):
         user_id = data.get("user_id")
-        logging.info(f"[USER ID] {user_id}")
 
         if user_id:
             if self.active_users.get(sid) == user_id:
-                logging.info(f"[SKIP] SID {sid} already assigned to User ID {user_id}")
+                logger.info(
+                    "Already bound",
+                    extra={"event": "set_user_id", "sid": sid, "user_id": user_id},
+                )
                 return
 
             existing_sids = [
@@ -35,37 +137,110 @@ class ChatNamespace(socketio.AsyncNamespace):
                 self.active_users.pop(old_sid, None)
                 try:
                     await self.disconnect(old_sid)
-                    logging.info(
-                        f"[DISCONNECT OLD] Disconnected old session SID: {old_sid}"
+                    logger.info(
+                        "Disconnected previous session",
+                        extra={"event": "set_user_id", "sid": old_sid},
                     )
                 except Exception as e:
-                    logging.error(f"Error disconnecting old session: {e}")
+                    logger.error(
+                        "Failed to disconnect previous session: %s",
+                        e,
+                        extra={"event": "set_user_id", "sid": old_sid},
+                    )
 
             self.active_users[sid] = user_id
-            self.online_users[user_id] = True
-            logging.info(f"[SET USER ID] SID: {sid} -> User ID: {user_id}")
-            logging.info(f"[ACTIVE USERS] {self.active_users}")
+            self._touch(user_id)
+            contacts = await self._get_contacts(user_id)
+            await self.presence.connect(user_id, sid, contacts)
+            logger.info(
+                "Bound user",
+                extra={
+                    "event": "set_user_id",
+                    "sid": sid,
+                    "user_id": user_id,
+                    "active_users": len(self.active_users),
+                },
+            )
+
+            await self.emit(
+                "online_users", self.presence.snapshot(user_id), room=sid
+            )
+
+    def _touch(self, user_id: str):
+        if self.activity is not None:
+            self.activity.touch(user_id)
+
+    async def _get_contacts(self, user_id: str):
+        if self.chat_service is None:
+            return []
+
+        try:
+            return await self.chat_service().get_chat_partner_ids(user_id)
+        except Exception as e:
+            logger.error(
+                "Failed to load contacts: %s", e, extra={"user_id": user_id}
+            )
+            return []
 
     async def on_get_online_users(self, sid):
-        logging.info(f"[GET ONLINE USERS] Request from SID: {sid}")
-        logging.info(f"[ONLINE USERS] Current online users: {self.online_users}")
-        online_users = {key: value for key, value in self.online_users.items()}
-        await self.emit("online_users", online_users, room=sid)
+        user_id = self.active_users.get(sid)
+        logger.info(
+            "Online users requested", extra={"event": "get_online_users", "sid": sid}
+        )
+
+        if not user_id:
+            await self.emit("online_users", {}, room=sid)
+            return
+
+        await self.emit("online_users", self.presence.snapshot(user_id), room=sid)
 
     async def on_disconnect(self, sid):
         user_id = self.active_users.pop(sid, None)
-        self.online_users.pop(user_id, None)
-        logging.info(f"[DISCONNECT] SID: {sid}, User ID: {user_id} disconnected")
+        await self.presence.disconnect(user_id, sid)
+        if user_id:
+            self._touch(user_id)
+        if self.rate_limiter is not None:
+            self.rate_limiter.forget(sid, user_id)
+        logger.info(
+            "Disconnected",
+            extra={"event": "disconnect", "sid": sid, "user_id": user_id},
+        )
+
+    async def on_heartbeat(self, sid):
+        user_id = self.active_users.get(sid)
+        if user_id:
+            self._touch(user_id)
+
+    async def on_read(self, sid, data):
+        user_id = self.active_users.get(sid)
+        if not isinstance(data, dict) or not user_id or self.activity is None:
+            return
+
+        try:
+            chat_id = int(data.get("chat_id"))
+            message_id = int(data.get("message_id"))
+        except (TypeError, ValueError):
+            logger.warning("Invalid read data", extra={"event": "read", "sid": sid})
+            return
+
+        if chat_id <= 0 or message_id <= 0:
+            return
+
+        self.activity.mark_read(chat_id, user_id, message_id)
 
     async def on_chat(self, sid, data):
 
         user_id = data.get("user_id")
 
-        logging.info(f"[ACTIVE USERS] {self.active_users}")
-
         if not user_id or not data:
             return
 
+        # user_id comes from the client, presence is only shared once the
+        # chat between the two actually exists
+        creator_id = self.active_users.get(sid)
+        if creator_id and user_id in await self._get_contacts(creator_id):
+            await self.presence.link(creator_id, user_id)
+
         await self.emit("new_chat", data["chat"])
 
     async def on_message(self, sid, data):
@@ -73,16 +248,21 @@ class ChatNamespace(socketio.AsyncNamespace):
         message = data.get("message")
         sender_id = self.active_users.get(sid)
 
-        logging.info(f"[USER DATA FROM MESSAGE] {data} and {sender_id}")
-
         if not all([recipient_id, message, sender_id]):
-            logging.warning("Invalid message data")
+            logger.warning(
+                "Invalid message data", extra={"event": "message", "sid": sid}
+            )
             return
 
         if sid not in self.active_users:
-            logging.warning(f"Unauthorized message attempt from SID: {sid}")
+            logger.warning(
+                "Message from an unbound connection",
+                extra={"event": "message", "sid": sid},
+            )
             return
 
+        self._touch(sender_id)
+
         recipient_sid = next(
             (s for s, u in self.active_users.items() if u == recipient_id), None
         )
@@ -95,6 +275,21 @@ class ChatNamespace(socketio.AsyncNamespace):
                 "created_at": datetime.now().isoformat(),
             }
             await self.emit("new_message", message_data, room=recipient_sid)
-            logging.info(f"Message from {sender_id} sent to {recipient_id}")
+            logger.info(
+                "Message relayed",
+                extra={
+                    "event": "message",
+                    "sender_id": sender_id,
+                    "recipient_id": recipient_id,
+                    "size": len(message),
+                },
+            )
         else:
-            logging.warning(f"Recipient {recipient_id} not connected")
+            logger.info(
+                "Recipient not connected",
+                extra={
+                    "event": "message",
+                    "sender_id": sender_id,
+                    "recipient_id": recipient_id,
+                },
+            )
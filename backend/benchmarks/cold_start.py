@@ -0,0 +1,73 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+APP = "app.application.main:app"
+
+
+def wait_for(client: httpx.Client, url: str, started: float, timeout: float):
+    while time.monotonic() - started < timeout:
+        try:
+            if client.get(url).status_code == 200:
+                return time.monotonic() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def run_once(port: int, timeout: float):
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", APP, "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=os.environ.copy(),
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            live = wait_for(client, "/livez", started, timeout)
+            ready = wait_for(client, "/readyz", started, timeout)
+            checks = client.get("/readyz").json()["checks"] if ready else {}
+    finally:
+        server.terminate()
+        server.wait()
+
+    return live, ready, checks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    lives, readies = [], []
+    print(f"{'run':<5}{'live s':>9}{'ready s':>9}  warm-up per check")
+    for run in range(1, args.runs + 1):
+        live, ready, checks = run_once(args.port, args.timeout)
+        timings = {name: check.get("elapsed") for name, check in checks.items()}
+        print(
+            f"{run:<5}{live if live is None else round(live, 3):>9}"
+            f"{ready if ready is None else round(ready, 3):>9}  {timings}"
+        )
+        if live is not None:
+            lives.append(live)
+        if ready is not None:
+            readies.append(ready)
+
+    if lives and readies:
+        print(
+            f"median live {statistics.median(lives):.3f}s, "
+            f"median ready {statistics.median(readies):.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import random
+import statistics
+import string
+import time
+from collections import Counter
+
+from app.core.config import settings
+from app.core.database import Database
+from app.core.typesense_conf import UserSchema, client
+from app.infrastructure.repositories.user_repository import UserRepository
+from app.infrastructure.search.postgres_backend import PostgresSearchBackend
+from app.infrastructure.search.typesense_backend import TypesenseSearchBackend
+from sqlalchemy import delete
+
+BACKENDS = ("postgres", "typesense")
+ID_PREFIX = "bench-"
+SYLLABLES = ["al", "ex", "an", "dr", "ma", "ri", "ko", "le", "na", "to", "vi", "sa"]
+
+
+def build_users(count: int, rng: random.Random):
+    usernames = set()
+    while len(usernames) < count:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        usernames.add(f"{name}{rng.randint(0, 9999)}")
+
+    return [
+        {
+            "supertokens_id": f"{ID_PREFIX}{i}",
+            "username": username,
+            "email": f"{ID_PREFIX}{i}@example.com",
+        }
+        for i, username in enumerate(sorted(usernames))
+    ]
+
+
+def with_typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word) - 1)
+    if rng.random() < 0.5:
+        # swap two neighbouring characters
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def build_queries(users, count: int, rng: random.Random):
+    queries = []
+    for _ in range(count):
+        username = rng.choice(users)["username"]
+        if rng.random() < 0.5:
+            queries.append(("prefix", username[: rng.randint(3, 6)], username))
+        else:
+            queries.append(("typo", with_typo(username, rng), username))
+    return queries
+
+
+async def measure(backend, queries, concurrency: int):
+    latencies = []
+    found = {"prefix": 0, "typo": 0}
+    for kind, query, expected in queries:
+        started = time.perf_counter()
+        documents = await backend.search(query)
+        latencies.append(time.perf_counter() - started)
+        if any(document["username"] == expected for document in documents):
+            found[kind] += 1
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def search(query):
+        async with semaphore:
+            await backend.search(query)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(search(query) for _, query, _ in queries))
+    throughput = len(queries) / (time.perf_counter() - started)
+
+    latencies.sort()
+    return {
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "mean": statistics.fmean(latencies),
+        "throughput": throughput,
+        "found": found,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS)
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = build_users(args.users, rng)
+    queries = build_queries(rows, args.queries, rng)
+
+    database = Database(settings.async_database_url)
+    await database.create_db()
+    repository = UserRepository(database.session)
+    collection = f"{UserSchema['name']}_bench_{int(time.time())}"
+    if "typesense" in args.backends:
+        await asyncio.to_thread(
+            client.collections.create, {**UserSchema, "name": collection}
+        )
+
+    backends = {}
+    if "postgres" in args.backends:
+        backends["postgres"] = PostgresSearchBackend(repository)
+    if "typesense" in args.backends:
+        backends["typesense"] = TypesenseSearchBackend(collection)
+    try:
+        if "postgres" in backends:
+            await backends["postgres"].prepare()
+        for i in range(0, len(rows), 5_000):
+            users = await repository.insert_ignoring_conflicts(rows[i:i + 5_000])
+            if "typesense" in backends:
+                await backends["typesense"].index(users)
+
+        print(
+            f"{args.users} users, {args.queries} queries "
+            f"(half prefixes, half with one typo), concurrency {args.concurrency}"
+        )
+        print(
+            f"{'backend':<11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'mean ms':>9}"
+            f"{'qps':>9}{'prefix hit':>12}{'typo hit':>10}"
+        )
+        totals = Counter(kind for kind, _, _ in queries)
+        for name, backend in backends.items():
+            # warm caches and connections before measuring
+            for _, query, _ in queries[:100]:
+                await backend.search(query)
+            result = await measure(backend, queries, args.concurrency)
+            found = result["found"]
+            print(
+                f"{name:<11}{result['p50'] * 1000:>9.2f}{result['p95'] * 1000:>9.2f}"
+                f"{result['p99'] * 1000:>9.2f}{result['mean'] * 1000:>9.2f}"
+                f"{result['throughput']:>9.0f}"
+                f"{found['prefix'] / totals['prefix']:>12.1%}"
+                f"{found['typo'] / totals['typo']:>10.1%}"
+            )
+    finally:
+        if "typesense" in backends:
+            await asyncio.to_thread(client.collections[collection].delete)
+        async with database.session() as session:
+            await session.execute(
+                delete(repository.model).where(
+                    repository.model.supertokens_id.startswith(ID_PREFIX)
+                )
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from socketio import packet
+from socketio.msgpack_packet import MsgPackPacket
+
+MESSAGES = 10_000
+NAMESPACE = "/chat"
+
+
+def build_payloads(count: int):
+    started_at = datetime(2024, 11, 10, 12, 0, 0)
+    return [
+        {
+            "sender_id": "2f1c7e0a-5d4b-4c1e-9a0f-6c3b2d1e0f9a",
+            "recipient_id": "8a7b6c5d-4e3f-4a2b-9c1d-0e9f8a7b6c5d",
+            "content": f"message number {i}, see you at the usual place",
+            "created_at": (started_at + timedelta(seconds=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def frame_header(length: int) -> int:
+    # server frames are unmasked
+    if length < 126:
+        return 2
+    return 4 if length < 65536 else 10
+
+
+def run(packet_class, payloads):
+    # permessage-deflate with context takeover and a 15 bit window, as uvicorn
+    # negotiates it with browsers
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+
+    started = time.process_time()
+    frames = []
+    for payload in payloads:
+        encoded = packet_class(
+            packet.EVENT, namespace=NAMESPACE, data=["new_message", payload]
+        ).encode()
+        if isinstance(encoded, str):
+            encoded = encoded.encode()
+        frames.append(encoded)
+    encode_cpu = time.process_time() - started
+
+    started = time.process_time()
+    deflated = []
+    for frame in frames:
+        # the trailing empty deflate block is stripped on the wire
+        deflated.append(
+            len(compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+        )
+    deflate_cpu = time.process_time() - started
+
+    raw_bytes = sum(len(frame) + frame_header(len(frame)) for frame in frames)
+    deflate_bytes = sum(length + frame_header(length) for length in deflated)
+    return raw_bytes, deflate_bytes, encode_cpu, deflate_cpu
+
+
+def main():
+    payloads = build_payloads(MESSAGES)
+    print(f"{MESSAGES} new_message events, WebSocket bytes including frame headers")
+    print(
+        f"{'encoding':<10}{'raw bytes':>12}{'deflate bytes':>16}"
+        f"{'encode ms':>12}{'deflate ms':>12}"
+    )
+    for name, packet_class in (("json", packet.Packet), ("msgpack", MsgPackPacket)):
+        raw_bytes, compressed_bytes, encode_cpu, deflate_cpu = run(
+            packet_class, payloads
+        )
+        print(
+            f"{name:<10}{raw_bytes:>12}{compressed_bytes:>16}"
+            f"{encode_cpu * 1000:>12.1f}{deflate_cpu * 1000:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
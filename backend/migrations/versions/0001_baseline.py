@@ -0,0 +1,74 @@
+"""baseline
+
+The schema create_all made before migrations existed. Every migration is
+written to be a no-op where create_all already got there, so databases made
+by any earlier version upgrade the same way.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 20:00:00
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("supertokens_id", sa.String(255), nullable=False, unique=True),
+        sa.Column("username", sa.String(50), nullable=True, unique=True),
+        sa.Column("email", sa.String(100), nullable=False, unique=True),
+        sa.Column("avatar_url", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "chats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "chat_members",
+        sa.Column(
+            "supertokens_id",
+            sa.String(),
+            sa.ForeignKey("users.supertokens_id", ondelete="CASCADE"),
+        ),
+        sa.Column("chat_id", sa.Integer(), sa.ForeignKey("chats.id", ondelete="CASCADE")),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "chat_id",
+            sa.Integer(),
+            sa.ForeignKey("chats.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "sender_id",
+            sa.String(),
+            sa.ForeignKey("users.supertokens_id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("messages")
+    op.drop_table("chat_members")
+    op.drop_table("chats")
+    op.drop_table("users")
@@ -0,0 +1,33 @@
+"""last seen and read receipts
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 20:00:01
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP WITH TIME ZONE"
+    )
+    op.execute(
+        "ALTER TABLE chat_members "
+        "ADD COLUMN IF NOT EXISTS last_read_message_id INTEGER"
+    )
+    op.create_index(
+        "ix_messages_chat_id_id", "messages", ["chat_id", "id"], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_chat_id_id", table_name="messages")
+    op.drop_column("chat_members", "last_read_message_id")
+    op.drop_column("users", "last_seen_at")
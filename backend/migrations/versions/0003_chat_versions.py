@@ -0,0 +1,28 @@
+"""chat versions for conditional GETs
+
+users.chats_version only existed in databases made by create_all, the chat
+list's ETag is derived from the chats' versions instead.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 20:00:02
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE chats ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0"
+    )
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS chats_version")
+
+
+def downgrade() -> None:
+    op.drop_column("chats", "version")
@@ -0,0 +1,25 @@
+"""users.updated_at for search index reconciliation
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 20:00:03
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at "
+        "TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "updated_at")
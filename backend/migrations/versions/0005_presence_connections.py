@@ -0,0 +1,37 @@
+"""presence shared between workers
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 20:00:04
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "presence_connections",
+        sa.Column("sid", sa.String(64), primary_key=True),
+        sa.Column("user_id", sa.String(255), nullable=False),
+        sa.Column("worker_id", sa.String(128), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+    for column in ("user_id", "worker_id", "expires_at"):
+        op.create_index(
+            f"ix_presence_connections_{column}",
+            "presence_connections",
+            [column],
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("presence_connections")
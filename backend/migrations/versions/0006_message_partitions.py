@@ -0,0 +1,132 @@
+"""monthly message partitions and their archives
+
+A plain messages table is rebuilt as one partitioned by month with its rows
+copied over, under an exclusive lock and before any worker serves. Partitions
+from the current month on are kept ahead by MessageArchiveStore at startup.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 20:00:05
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Sequence, Tuple, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "message_archives",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("partition", sa.String(63), nullable=False, unique=True),
+        sa.Column("range_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("range_end", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("path", sa.String(1024), nullable=False),
+        sa.Column("rows", sa.Integer(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "message_archive_chats",
+        sa.Column(
+            "archive_id",
+            sa.Integer(),
+            sa.ForeignKey("message_archives.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "chat_id",
+            sa.Integer(),
+            sa.ForeignKey("chats.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("offset", sa.BigInteger(), nullable=False),
+        sa.Column("length", sa.BigInteger(), nullable=False),
+        sa.Column("rows", sa.Integer(), nullable=False),
+        sa.Column("min_id", sa.Integer(), nullable=False),
+        sa.Column("max_id", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_message_archive_chats_chat_id",
+        "message_archive_chats",
+        ["chat_id"],
+        if_not_exists=True,
+    )
+
+    bind = op.get_bind()
+    kind = bind.scalar(
+        sa.text(
+            "SELECT relkind::text FROM pg_class WHERE oid = to_regclass('messages')"
+        )
+    )
+    if kind != "r":
+        return
+
+    for statement in (
+        "LOCK TABLE messages IN ACCESS EXCLUSIVE MODE",
+        "ALTER TABLE messages RENAME TO messages_legacy",
+        "ALTER INDEX IF EXISTS messages_pkey RENAME TO messages_legacy_pkey",
+        "ALTER INDEX IF EXISTS ix_messages_chat_id_id "
+        "RENAME TO ix_messages_legacy_chat_id_id",
+        "ALTER SEQUENCE IF EXISTS messages_id_seq RENAME TO messages_legacy_id_seq",
+        "CREATE TABLE messages ("
+        "id SERIAL NOT NULL, "
+        "chat_id INTEGER NOT NULL REFERENCES chats (id) ON DELETE CASCADE, "
+        "sender_id VARCHAR REFERENCES users (supertokens_id) ON DELETE SET NULL, "
+        "content TEXT, "
+        "created_at TIMESTAMP WITH TIME ZONE NOT NULL, "
+        "PRIMARY KEY (id, created_at)"
+        ") PARTITION BY RANGE (created_at)",
+        "CREATE INDEX ix_messages_chat_id_id ON messages (chat_id, id)",
+    ):
+        op.execute(statement)
+
+    oldest = bind.scalar(sa.text("SELECT min(created_at) FROM messages_legacy"))
+    for name, start, end in _months(oldest or datetime.now(timezone.utc)):
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF messages "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+    op.execute(
+        "INSERT INTO messages (id, chat_id, sender_id, content, created_at) "
+        "SELECT id, chat_id, sender_id, content, coalesce(created_at, now()) "
+        "FROM messages_legacy"
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('messages', 'id'), max(id)) "
+        "FROM messages HAVING max(id) IS NOT NULL"
+    )
+    op.execute("DROP TABLE messages_legacy")
+
+
+def downgrade() -> None:
+    # the partitioned table is kept, archived rows only exist in their files
+    op.drop_table("message_archive_chats")
+    op.drop_table("message_archives")
+
+
+def _months(since: datetime) -> List[Tuple[str, datetime, datetime]]:
+    def month_start(at: datetime) -> datetime:
+        at = at.astimezone(timezone.utc)
+        return at.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    def next_month(start: datetime) -> datetime:
+        return (start + timedelta(days=32)).replace(day=1)
+
+    start = month_start(since)
+    end = next_month(next_month(month_start(datetime.now(timezone.utc))))
+    partitions = []
+    while start <= end:
+        partitions.append(
+            (f"messages_y{start.year:04d}m{start.month:02d}", start, next_month(start))
+        )
+        start = next_month(start)
+    return partitions
@@ -0,0 +1,116 @@
+"""attachments with resumable uploads
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 20:00:06
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "attachments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(64), nullable=False, unique=True),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "attachment_uploads",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.String(255),
+            sa.ForeignKey("users.supertokens_id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("content_type", sa.String(255), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("offset", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "attachment_id",
+            sa.Integer(),
+            sa.ForeignKey("attachments.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+    for column in ("user_id", "sha256", "expires_at"):
+        op.create_index(
+            f"ix_attachment_uploads_{column}",
+            "attachment_uploads",
+            [column],
+            if_not_exists=True,
+        )
+
+    op.create_table(
+        "message_attachments",
+        sa.Column("message_id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "attachment_id",
+            sa.Integer(),
+            sa.ForeignKey("attachments.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "chat_id",
+            sa.Integer(),
+            sa.ForeignKey("chats.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("content_type", sa.String(255), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_message_attachments_chat_id",
+        "message_attachments",
+        ["chat_id"],
+        if_not_exists=True,
+    )
+
+    # the first uploader's name used to be kept on the shared row, messages
+    # sent meanwhile keep the name they were shown with
+    bind = op.get_bind()
+    named = bind.scalar(
+        sa.text(
+            "SELECT count(*) FROM information_schema.columns "
+            "WHERE table_name = 'attachments' AND column_name = 'filename'"
+        )
+    )
+    if named:
+        for column in ("content_type", "filename"):
+            op.execute(
+                f"ALTER TABLE message_attachments "
+                f"ADD COLUMN IF NOT EXISTS {column} VARCHAR(255)"
+            )
+        op.execute(
+            "UPDATE message_attachments m "
+            "SET content_type = a.content_type, filename = a.filename "
+            "FROM attachments a "
+            "WHERE a.id = m.attachment_id AND m.filename IS NULL"
+        )
+        for column in ("content_type", "filename"):
+            op.execute(
+                f"ALTER TABLE message_attachments ALTER COLUMN {column} SET NOT NULL"
+            )
+            op.execute(f"ALTER TABLE attachments DROP COLUMN {column}")
+
+
+def downgrade() -> None:
+    op.drop_table("message_attachments")
+    op.drop_table("attachment_uploads")
+    op.drop_table("attachments")
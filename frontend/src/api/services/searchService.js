@@ -8,6 +8,10 @@ export const searchService = {
       });
       return Array.isArray(response.data) ? response.data : [response.data];
     } catch (error) {
+      // nobody matched
+      if (error.response?.status === 404) {
+        return [];
+      }
       console.error("Search error:", error);
       throw error;
     }
@@ -2,6 +2,9 @@ import apiClient from "../client";
 import getImageUrl from "@/helpers/imageUrl";
 import { authService } from "./authService";
 
+// newest messages per request, older ones are paged in with beforeId
+export const MESSAGE_PAGE_SIZE = 50;
+
 export const userService = {
   getProfile: async () => {
     const { data } = await apiClient.get("/profile/");
@@ -79,19 +82,26 @@ export const userService = {
 
   sendMessage: async (chatId, message) => {
     try {
-      await apiClient.post("/send_message/", {
+      const response = await apiClient.post("/send_message/", {
         chat_id: chatId,
         content: message,
       });
+      // passed on with the socket event so both land in the same trace
+      return { ...response.data, traceparent: response.headers.traceparent };
     } catch (error) {
       console.error("Error sending message:", error);
       throw error;
     }
   },
 
-  getMessages: async (chatId) => {
+  getMessages: async (
+    chatId,
+    { limit = MESSAGE_PAGE_SIZE, beforeId } = {}
+  ) => {
     try {
-      const response = await apiClient.get(`/messages/${chatId}`);
+      const response = await apiClient.get(`/messages/${chatId}`, {
+        params: { limit, before_id: beforeId },
+      });
       return response.data;
     } catch (error) {
       console.error("Error fetching messages:", error);
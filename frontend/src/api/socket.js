@@ -8,4 +8,25 @@ const socket = io("http://localhost:8000/chat", {
   },
 });
 
+let lastUserId = null;
+
+socket.onAnyOutgoing((event, data) => {
+  if (event === "set_user_id") {
+    lastUserId = data?.user_id ?? null;
+  }
+});
+
+socket.on("connect", () => {
+  if (lastUserId) {
+    socket.emit("set_user_id", { user_id: lastUserId });
+  }
+});
+
+// sent by a server that is shutting down, every client gets its own delay so
+// they don't all reconnect at the same moment
+socket.on("reconnect_advice", ({ delay }) => {
+  socket.disconnect();
+  setTimeout(() => socket.connect(), delay);
+});
+
 export default socket;
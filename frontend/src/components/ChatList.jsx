@@ -33,7 +33,9 @@ function ChatList({ onSelectChat, onDeleteChat }) {
         setCurrentUserId(userId);
 
         const messagesPromises = chatsData.map(async (chat) => {
-          const messages = await userService.getMessages(chat.id);
+          const messages = await userService.getMessages(chat.id, {
+            limit: 1,
+          });
           const lastMessage = messages[messages.length - 1];
           return {
             chatId: chat.id,
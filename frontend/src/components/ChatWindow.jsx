@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef } from "react";
 import { IoSend } from "react-icons/io5";
 import getImageUrl from "@/helpers/imageUrl";
-import { userService } from "@/api/services/userService";
+import { userService, MESSAGE_PAGE_SIZE } from "@/api/services/userService";
 import { Avatar, AvatarFallback, AvatarImage } from "@/components/ui/avatar";
 import Message from "./Message";
 import { authService } from "@/api/services/authService";
@@ -68,7 +68,10 @@ function MessageHeader({ currentUserId }) {
 function MessageWindow() {
   const { selectedChat } = useChat();
   const [messages, setMessages] = useState([]);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const messagesEndRef = useRef(null);
+  const scrollRef = useRef(null);
   const [currentUserId, setCurrentUserId] = useState(null);
 
   // Get current user on component mount
@@ -94,6 +97,7 @@ function MessageWindow() {
             isOwn: msg.sender_id === currentUserId,
           }));
           setMessages(formattedMessages);
+          setHasOlder(fetchedMessages.length === MESSAGE_PAGE_SIZE);
           messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
         } catch (error) {
           console.error("Error fetching messages:", error);
@@ -104,6 +108,44 @@ function MessageWindow() {
     fetchMessages();
   }, [selectedChat, currentUserId]);
 
+  // Load the previous page when scrolled to the top
+  const handleScroll = async () => {
+    const container = scrollRef.current;
+    if (
+      !container ||
+      container.scrollTop > 0 ||
+      !hasOlder ||
+      loadingOlder ||
+      messages.length === 0
+    ) {
+      return;
+    }
+
+    setLoadingOlder(true);
+    try {
+      const olderMessages = await userService.getMessages(selectedChat.id, {
+        beforeId: messages[0].id,
+      });
+      const fromBottom = container.scrollHeight - container.scrollTop;
+      setMessages((prevMessages) => [
+        ...olderMessages.map((msg) => ({
+          ...msg,
+          isOwn: msg.sender_id === currentUserId,
+        })),
+        ...prevMessages,
+      ]);
+      setHasOlder(olderMessages.length === MESSAGE_PAGE_SIZE);
+      // keep the messages in view where they were
+      requestAnimationFrame(() => {
+        container.scrollTop = container.scrollHeight - fromBottom;
+      });
+    } catch (error) {
+      console.error("Error fetching older messages:", error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   // Handle new messages via socket
   useEffect(() => {
     const handleNewMessage = (msg) => {
@@ -164,6 +206,7 @@ function MessageWindow() {
         chat_id: selectedChat.id,
         recipient_id: recipientId,
         message: text,
+        traceparent: response?.traceparent,
       });
     } catch (error) {
       console.error("Error sending message:", error);
@@ -181,6 +224,8 @@ function MessageWindow() {
       <div className="absolute inset-0 bg-[url('/images/background.png')] bg-cover bg-center opacity-50"></div>
       {selectedChat && <MessageHeader currentUserId={currentUserId} />}
       <div
+        ref={scrollRef}
+        onScroll={handleScroll}
         className="relative flex flex-col flex-1 w-2/3 mx-auto mb-20 px-14 my-3 overflow-y-auto custom-scrollbar"
         style={{ justifyContent: "flex-end" }}
       >
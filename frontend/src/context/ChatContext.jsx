@@ -24,10 +24,24 @@ export const ChatProvider = ({ children }) => {
       setOnlineUsers(users);
     });
 
+    socket.on("presence_diff", ({ online, offline }) => {
+      setOnlineUsers((prev) => {
+        const next = { ...prev };
+        online.forEach((userId) => {
+          next[userId] = true;
+        });
+        offline.forEach((userId) => {
+          delete next[userId];
+        });
+        return next;
+      });
+    });
+
     socket.emit("get_online_users");
 
     return () => {
       socket.off("online_users");
+      socket.off("presence_diff");
     };
   }, []);
 